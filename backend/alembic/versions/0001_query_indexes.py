@@ -0,0 +1,44 @@
+"""Composite indexes for itinerary, item and budget reads
+
+Tables themselves are still created by init_db() (metadata.create_all),
+which also creates these indexes on a fresh database; this revision adds
+them to databases created before the indexes existed.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_itineraries_user_start_date",
+        "itineraries",
+        ["user_id", sa.text("start_date DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_itinerary_items_itinerary_visit",
+        "itinerary_items",
+        ["itinerary_id", "visit_date", "visit_order"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_budgets_itinerary_spent_at",
+        "budgets",
+        ["itinerary_id", "spent_at"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_budgets_itinerary_spent_at", table_name="budgets", if_exists=True)
+    op.drop_index("ix_itinerary_items_itinerary_visit", table_name="itinerary_items", if_exists=True)
+    op.drop_index("ix_itineraries_user_start_date", table_name="itineraries", if_exists=True)
@@ -0,0 +1,38 @@
+"""Columns for the database-backed /api/itineraries router
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _add_column(table: str, column: sa.Column):
+    # The app's create_all may already have made the column
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+    if column.name not in existing:
+        op.add_column(table, column)
+
+
+def upgrade():
+    _add_column("itineraries", sa.Column("destination", sa.String(200), nullable=True))
+    _add_column("itinerary_items", sa.Column("place_name_kr", sa.String(255), nullable=True))
+    _add_column("itinerary_items", sa.Column("address", sa.Text(), nullable=True))
+    _add_column("itinerary_items", sa.Column("visit_time", sa.String(5), nullable=True))
+    _add_column("itinerary_items", sa.Column("external_place_id", sa.String(255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("itinerary_items") as batch:
+        batch.drop_column("external_place_id")
+        batch.drop_column("visit_time")
+        batch.drop_column("address")
+        batch.drop_column("place_name_kr")
+    with op.batch_alter_table("itineraries") as batch:
+        batch.drop_column("destination")
@@ -0,0 +1,25 @@
+"""Index for place lookups by external id
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_itinerary_items_itinerary_place",
+        "itinerary_items",
+        ["itinerary_id", "external_place_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_itinerary_items_itinerary_place", table_name="itinerary_items", if_exists=True)
@@ -0,0 +1,33 @@
+"""Geocode cache table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The app's create_all may already have made the table
+    if sa.inspect(op.get_bind()).has_table("geocode_cache"):
+        return
+    op.create_table(
+        "geocode_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(16), nullable=False),
+        sa.Column("cache_key", sa.String(255), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("kind", "cache_key", name="uq_geocode_cache_key"),
+    )
+    op.create_index("ix_geocode_cache_id", "geocode_cache", ["id"])
+
+
+def downgrade():
+    op.drop_table("geocode_cache")
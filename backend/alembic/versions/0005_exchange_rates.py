@@ -0,0 +1,34 @@
+"""Daily exchange-rate history table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The app's create_all may already have made the table
+    if sa.inspect(op.get_bind()).has_table("exchange_rates"):
+        return
+    op.create_table(
+        "exchange_rates",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("base", sa.String(3), nullable=False),
+        sa.Column("quote", sa.String(3), nullable=False),
+        sa.Column("rate_date", sa.Date(), nullable=False),
+        sa.Column("rate", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("base", "quote", "rate_date", name="uq_exchange_rate_day"),
+    )
+    op.create_index("ix_exchange_rates_id", "exchange_rates", ["id"])
+
+
+def downgrade():
+    op.drop_table("exchange_rates")
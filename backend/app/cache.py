@@ -0,0 +1,189 @@
+# backend/app/cache.py
+"""Response caching: in-process LRU tier with an optional shared Redis tier"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Query params that never take part in a cache key (credentials, format flags)
+_IGNORED_PARAMS = {"serviceKey", "_type", "MobileOS", "MobileApp"}
+
+_redis = None
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a per-entry TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class ResponseCache:
+    """Two-tier cache: per-process LRU in front of an optional Redis tier"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.local = TTLCache(maxsize, ttl)
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None or _redis is None:
+            return value
+        try:
+            raw = await _redis.get(f"{self.name}:{key}")
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning("Redis cache read failed: %s", e)
+            return None
+        if raw is None:
+            self.redis_misses += 1
+            return None
+        payload = json.loads(raw)
+        remaining = payload["expires_at"] - time.time()
+        if remaining <= 0:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        self.local.set(key, payload["value"], remaining)
+        return payload["value"]
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.local.ttl
+        self.local.set(key, value, ttl)
+        if _redis is None:
+            return
+        payload = json.dumps({"expires_at": time.time() + ttl, "value": value})
+        try:
+            await _redis.set(f"{self.name}:{key}", payload, ex=max(int(ttl), 1))
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning("Redis cache write failed: %s", e)
+
+    async def delete(self, key: str):
+        self.local.delete(key)
+        if _redis is None:
+            return
+        try:
+            await _redis.delete(f"{self.name}:{key}")
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning("Redis cache delete failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self.local.stats(),
+            "redis": {
+                "enabled": _redis is not None,
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "errors": self.redis_errors,
+            },
+        }
+
+
+def make_key(namespace: str, params: Dict[str, Any]) -> str:
+    """Build a stable cache key from normalized query params"""
+    normalized = {
+        k: str(v).strip()
+        for k, v in params.items()
+        if v is not None and k not in _IGNORED_PARAMS
+    }
+    digest = hashlib.sha1(
+        json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+async def init_redis():
+    """Connect the shared Redis tier if enabled and available"""
+    global _redis
+    if not settings.REDIS_CACHE_ENABLED:
+        return
+    if aioredis is None:
+        logger.warning("REDIS_CACHE_ENABLED is set but the redis package is not installed")
+        return
+    _redis = aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        decode_responses=True,
+    )
+
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+tour_cache = ResponseCache("tour", settings.TOUR_CACHE_MAX_ENTRIES, settings.TOUR_LIST_CACHE_TTL)
+rates_cache = ResponseCache(
+    "rates", settings.EXCHANGE_RATE_CACHE_MAX_BASES, settings.EXCHANGE_RATE_REFRESH_INTERVAL
+)
+
+# Coordinate searches keyed by snapped geocell and radius bucket
+geo_cache = ResponseCache("geo", settings.GEO_CACHE_MAX_ENTRIES, settings.GEO_CACHE_TTL)
+
+caches: Dict[str, ResponseCache] = {
+    "tour": tour_cache,
+    "rates": rates_cache,
+    "geo": geo_cache,
+}
@@ -2,7 +2,7 @@
 import os
 from typing import List, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import AliasChoices, Field
 
 
 class Settings(BaseSettings):
@@ -36,6 +36,10 @@ class Settings(BaseSettings):
     )
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Authenticated-principal cache (per process; seconds)
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    
     # OAuth (Optional for testing - commented out for now)
     GOOGLE_CLIENT_ID: Optional[str] = Field(
         default=None,
@@ -46,6 +50,49 @@ class Settings(BaseSettings):
         env="GOOGLE_CLIENT_SECRET"
     )
     
+    # Bulk endpoints
+    BULK_MAX_ROWS: int = 500
+    
+    # Route optimization (stops per itinerary day) and distance matrices
+    ROUTE_MAX_STOPS: int = 200
+    DISTANCE_CACHE_MAX_ITINERARIES: int = 256
+    DISTANCE_CACHE_TTL: int = 3600
+    
+    # Concurrent page requests per Kakao "limit" search
+    KAKAO_PAGE_CONCURRENCY: int = 3
+    
+    # Federated place search: per-source deadlines (seconds) and how close a
+    # Kakao and a TourAPI place with matching names must be to merge
+    FEDERATED_KAKAO_TIMEOUT: float = 2.0
+    FEDERATED_TOUR_TIMEOUT: float = 3.0
+    FEDERATED_MATCH_METERS: int = 200
+    # TourAPI keyword matches fetched before filtering to the search circle
+    FEDERATED_TOUR_ROWS: int = 100
+    
+    # Spatial index of known places (grid cell size in degrees, ~550 m N-S)
+    SPATIAL_CELL_DEG: float = 0.005
+    SPATIAL_INDEX_MAX_PLACES: int = 200000
+    SPATIAL_WARM_TTL: int = 6 * 3600
+    
+    # Coordinate searches: snap the centre to a geocell and round the radius
+    # up to a bucket so nearby callers share one upstream response
+    GEOCELL_CACHE_ENABLED: bool = True
+    GEOCELL_METERS: int = 100
+    GEOCELL_RADIUS_BUCKETS: List[int] = [250, 500, 1000, 2000, 5000, 10000, 20000]
+    GEO_CACHE_MAX_ENTRIES: int = 4096
+    GEO_CACHE_TTL: int = 1800
+    # TourAPI spots fetched per shared geocell query (larger requests go exact)
+    GEOCELL_TOUR_ROWS: int = 50
+    
+    # Geocoding results (memory LRU in front of the geocode_cache table);
+    # reverse lookups are keyed by coordinates rounded to GEOCODE_PRECISION
+    # decimals (4 is ~11 m)
+    GEOCODE_PRECISION: int = 4
+    GEOCODE_CACHE_MAX_ENTRIES: int = 20000
+    GEOCODE_CACHE_TTL: int = 30 * 24 * 3600
+    GEOCODE_BULK_MAX_QUERIES: int = 100
+    GEOCODE_BULK_CONCURRENCY: int = 8
+    
     # External APIs
     TOUR_API_KEY: str = Field(
         default="c745faba8eea6de1385f50ed9370cdf9eb0decd5df2f09c22a338bdb6e02b32a",
@@ -55,12 +102,28 @@ class Settings(BaseSettings):
         default="fa7c31d05cde8de2056e916709884cfc",
         env="KAKAO_REST_API_KEY"
     )
+    # EXCHANGE_API_KEY is the legacy name previously read by routers/currency.py
     EXCHANGE_RATE_API_KEY: Optional[str] = Field(
         default=None,
-        env="EXCHANGE_RATE_API_KEY"
+        validation_alias=AliasChoices("EXCHANGE_RATE_API_KEY", "EXCHANGE_API_KEY")
     )
     EXCHANGE_RATE_API_URL: str = "https://v6.exchangerate-api.com/v6"
     
+    # Exchange-rate cache (seconds); tables are refreshed in the background
+    EXCHANGE_RATE_CACHE_MAX_BASES: int = 32
+    EXCHANGE_RATE_REFRESH_INTERVAL: int = 3000
+    EXCHANGE_RATE_REFRESH_CHECK: int = 60
+    EXCHANGE_RATE_MAX_STALE: int = 24 * 3600
+    EXCHANGE_RATE_HISTORY_ENABLED: bool = True
+    
+    # Upstream HTTP client (shared connection pool)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    TOUR_API_TIMEOUT: float = 30.0
+    
     # Redis (Optional for caching)
     REDIS_HOST: str = Field(
         default="localhost",
@@ -70,6 +133,13 @@ class Settings(BaseSettings):
         default=6379,
         env="REDIS_PORT"
     )
+    REDIS_CACHE_ENABLED: bool = False
+    
+    # Response cache (TourAPI lookups, TTLs in seconds)
+    TOUR_CACHE_MAX_ENTRIES: int = 2048
+    TOUR_SEARCH_CACHE_TTL: int = 3600
+    TOUR_LIST_CACHE_TTL: int = 6 * 3600
+    TOUR_DETAIL_CACHE_TTL: int = 24 * 3600
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
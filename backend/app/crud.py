@@ -1,9 +1,11 @@
 # backend/app/crud.py
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_, delete, insert, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from sqlalchemy.orm import selectinload
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from . import models, schemas
+from . import models, ordering, schemas
 
 
 # Users
@@ -39,18 +41,38 @@ async def create_user(db: AsyncSession, user_in: schemas.UserCreate) -> models.U
 
 # Itineraries
 async def get_itineraries(
-    db: AsyncSession, user_id: int, limit: int = 10, offset: int = 0
+    db: AsyncSession, user_id: int, limit: int = 10,
+    after: Optional[Tuple[date, int]] = None, with_items: bool = False
 ) -> List[models.Itinerary]:
+    """Keyset page ordered by (start_date, id) descending, starting after ``after``"""
+    stmt = select(models.Itinerary).where(models.Itinerary.user_id == user_id)
+    if with_items:
+        stmt = stmt.options(selectinload(models.Itinerary.items))
+    if after is not None:
+        start_date, itinerary_id = after
+        stmt = stmt.where(
+            or_(
+                models.Itinerary.start_date < start_date,
+                and_(
+                    models.Itinerary.start_date == start_date,
+                    models.Itinerary.id < itinerary_id
+                )
+            )
+        )
     result = await db.execute(
-        select(models.Itinerary)
-        .where(models.Itinerary.user_id == user_id)
-        .order_by(models.Itinerary.start_date.desc())
+        stmt
+        .order_by(models.Itinerary.start_date.desc(), models.Itinerary.id.desc())
         .limit(limit)
-        .offset(offset)
     )
     return list(result.scalars().all())
 
 
+async def count_itineraries(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(
+        select(func.count()).where(models.Itinerary.user_id == user_id)
+    )
+
+
 async def create_itinerary(
     db: AsyncSession, user_id: int, data: schemas.ItineraryCreate
 ) -> models.Itinerary:
@@ -73,6 +95,161 @@ async def get_itinerary(
     return result.scalars().first()
 
 
+async def get_itinerary_full(
+    db: AsyncSession, itinerary_id: int, user_id: int
+) -> Optional[models.Itinerary]:
+    """Itinerary with items and budgets: one query per table, none per row"""
+    result = await db.execute(
+        select(models.Itinerary)
+        .where(
+            models.Itinerary.id == itinerary_id,
+            models.Itinerary.user_id == user_id
+        )
+        .options(
+            selectinload(models.Itinerary.items),
+            selectinload(models.Itinerary.budgets),
+        )
+    )
+    return result.scalars().first()
+
+
+async def owns_itinerary(
+    db: AsyncSession, itinerary_id: int, user_id: int
+) -> bool:
+    result = await db.execute(
+        select(models.Itinerary.id).where(
+            models.Itinerary.id == itinerary_id,
+            models.Itinerary.user_id == user_id
+        )
+    )
+    return result.first() is not None
+
+
+def _owned_itinerary_ids(user_id: int):
+    return select(models.Itinerary.id).where(models.Itinerary.user_id == user_id)
+
+
+async def touch_itinerary(
+    db: AsyncSession, itinerary_id: int, user_id: int
+) -> bool:
+    """Bump updated_at on an owned itinerary (uncommitted); False if not owned"""
+    result = await db.execute(
+        update(models.Itinerary)
+        .where(
+            models.Itinerary.id == itinerary_id,
+            models.Itinerary.user_id == user_id
+        )
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+# Read orders matching the composite indexes in models.py
+_ITEM_ORDER = (
+    models.ItineraryItem.visit_date,
+    models.ItineraryItem.visit_order,
+    models.ItineraryItem.id,
+)
+_BUDGET_ORDER = (models.Budget.spent_at, models.Budget.id)
+
+
+# Ownership-scoped reads shared by items and budgets: the owner filter is
+# part of the data query, so each read is a single round trip.
+async def _get_owned_children(
+    db: AsyncSession, model, itinerary_id: int, user_id: int,
+    order_by: Sequence = (), criteria: Sequence = ()
+) -> Optional[list]:
+    """Rows of an owned itinerary; None if the itinerary is missing or not owned"""
+    result = await db.execute(
+        select(models.Itinerary.id, model)
+        .outerjoin(model, and_(model.itinerary_id == models.Itinerary.id, *criteria))
+        .where(
+            models.Itinerary.id == itinerary_id,
+            models.Itinerary.user_id == user_id
+        )
+        .order_by(*order_by)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    return [obj for _, obj in rows if obj is not None]
+
+
+async def _get_owned_child(
+    db: AsyncSession, model, itinerary_id: int, row_id: int, user_id: int
+):
+    result = await db.execute(
+        select(model)
+        .join(models.Itinerary, model.itinerary_id == models.Itinerary.id)
+        .where(
+            model.id == row_id,
+            model.itinerary_id == itinerary_id,
+            models.Itinerary.user_id == user_id
+        )
+    )
+    return result.scalars().first()
+
+
+# Bulk helpers shared by items and budgets (one statement, one transaction)
+async def _bulk_insert(
+    db: AsyncSession, model, itinerary_id: int, rows: Sequence[Dict[str, Any]]
+) -> list:
+    if not rows:
+        return []
+    result = await db.scalars(
+        insert(model).returning(model, sort_by_parameter_order=True),
+        [{**row, "itinerary_id": itinerary_id} for row in rows],
+    )
+    created = list(result.all())
+    await db.commit()
+    return created
+
+
+async def _bulk_update(
+    db: AsyncSession, model, itinerary_id: int, user_id: int,
+    rows: Sequence[Dict[str, Any]]
+) -> Optional[list]:
+    """Update rows by primary key; None if any id is not in the owned itinerary"""
+    ids = [row["id"] for row in rows]
+    owned = await db.scalars(
+        select(model.id)
+        .join(models.Itinerary, model.itinerary_id == models.Itinerary.id)
+        .where(
+            model.id.in_(ids),
+            model.itinerary_id == itinerary_id,
+            models.Itinerary.user_id == user_id
+        )
+    )
+    if set(owned.all()) != set(ids):
+        return None
+    if rows:
+        now = datetime.utcnow()
+        await db.execute(update(model), [{**row, "updated_at": now} for row in rows])
+    await db.commit()
+    result = await db.scalars(
+        select(model)
+        .where(model.id.in_(ids))
+        .execution_options(populate_existing=True)
+    )
+    by_id = {obj.id: obj for obj in result.all()}
+    return [by_id[i] for i in ids]
+
+
+async def _bulk_delete(
+    db: AsyncSession, model, itinerary_id: int, user_id: int, ids: Sequence[int]
+) -> int:
+    result = await db.execute(
+        delete(model).where(
+            model.id.in_(ids),
+            model.itinerary_id == itinerary_id,
+            model.itinerary_id.in_(_owned_itinerary_ids(user_id))
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
 # Items
 async def add_item(
     db: AsyncSession, itinerary_id: int, data: schemas.ItineraryItemCreate
@@ -84,17 +261,197 @@ async def add_item(
     return item
 
 
-async def get_items(
-    db: AsyncSession, itinerary_id: int
+async def add_items(
+    db: AsyncSession, itinerary_id: int, data: Sequence[schemas.ItineraryItemCreate]
 ) -> List[models.ItineraryItem]:
+    return await _bulk_insert(
+        db, models.ItineraryItem, itinerary_id, [d.model_dump() for d in data]
+    )
+
+
+async def update_items(
+    db: AsyncSession, itinerary_id: int, user_id: int, data: Sequence[schemas.ItineraryItemUpdate]
+) -> Optional[List[models.ItineraryItem]]:
+    return await _bulk_update(
+        db, models.ItineraryItem, itinerary_id, user_id, [d.model_dump() for d in data]
+    )
+
+
+async def delete_items(
+    db: AsyncSession, itinerary_id: int, user_id: int, ids: Sequence[int]
+) -> int:
+    return await _bulk_delete(db, models.ItineraryItem, itinerary_id, user_id, ids)
+
+
+async def get_owned_items(
+    db: AsyncSession, itinerary_id: int, user_id: int,
+    visit_date: Optional[date] = None
+) -> Optional[List[models.ItineraryItem]]:
+    criteria = []
+    if visit_date is not None:
+        criteria.append(models.ItineraryItem.visit_date == visit_date)
+    return await _get_owned_children(
+        db, models.ItineraryItem, itinerary_id, user_id, _ITEM_ORDER, criteria
+    )
+
+
+def _place_filter(place_id: str):
+    """Match items by external place id, or by row id for items added via /api/v1"""
+    clause = models.ItineraryItem.external_place_id == place_id
+    if place_id.isdigit():
+        clause = or_(
+            clause,
+            and_(
+                models.ItineraryItem.external_place_id.is_(None),
+                models.ItineraryItem.id == int(place_id)
+            )
+        )
+    return clause
+
+
+async def delete_place(
+    db: AsyncSession, itinerary_id: int, user_id: int, place_id: str
+) -> List[int]:
+    """Delete matching places; returns the deleted item ids"""
     result = await db.execute(
-        select(models.ItineraryItem).where(
-            models.ItineraryItem.itinerary_id == itinerary_id
+        delete(models.ItineraryItem)
+        .where(
+            _place_filter(place_id),
+            models.ItineraryItem.itinerary_id == itinerary_id,
+            models.ItineraryItem.itinerary_id.in_(_owned_itinerary_ids(user_id))
         )
+        .returning(models.ItineraryItem.id)
+        .execution_options(synchronize_session=False)
     )
     return list(result.scalars().all())
 
 
+def _same_day(itinerary_id: int, visit_date: Optional[date]):
+    """Rows of one itinerary day: a prefix of ix_itinerary_items_itinerary_visit"""
+    if visit_date is None:
+        day = models.ItineraryItem.visit_date.is_(None)
+    else:
+        day = models.ItineraryItem.visit_date == visit_date
+    return and_(models.ItineraryItem.itinerary_id == itinerary_id, day)
+
+
+async def next_visit_order(
+    db: AsyncSession, itinerary_id: int, visit_date: Optional[date]
+) -> int:
+    """Ordering key that appends to the end of a day (one index seek)"""
+    current = await db.scalar(
+        select(func.max(models.ItineraryItem.visit_order))
+        .where(_same_day(itinerary_id, visit_date))
+    )
+    return ordering.key_after(current)
+
+
+async def move_place(
+    db: AsyncSession, itinerary_id: int, user_id: int, place_id: str, position: int
+) -> bool:
+    """Move a place to a 1-based position within its day (uncommitted).
+
+    Normally writes one row with a key between its new neighbours; the day
+    is renumbered only when those neighbours have no gap left.
+    """
+    result = await db.execute(
+        select(models.ItineraryItem)
+        .where(
+            _place_filter(place_id),
+            models.ItineraryItem.itinerary_id == itinerary_id,
+            models.ItineraryItem.itinerary_id.in_(_owned_itinerary_ids(user_id))
+        )
+        .limit(1)
+    )
+    item = result.scalars().first()
+    if item is None:
+        return False
+    await position_item(db, itinerary_id, item, position)
+    return True
+
+
+async def position_item(
+    db: AsyncSession, itinerary_id: int, item: models.ItineraryItem, position: int
+) -> None:
+    """Give a flushed item the key for a 1-based position within its day (uncommitted).
+    
+    The API addresses places by position, so the neighbours are found with
+    OFFSET position - 2 on the day's index range: O(position) rows read,
+    bounded by the size of one day. Only the new key is written, except
+    when the gap is exhausted and the day is renumbered.
+    """
+    others = (
+        select(models.ItineraryItem.id, models.ItineraryItem.visit_order)
+        .where(
+            _same_day(itinerary_id, item.visit_date),
+            models.ItineraryItem.id != item.id
+        )
+        .order_by(*_ITEM_ORDER)
+    )
+    # Neighbours at positions - 1 and position among the other places
+    neighbours = (await db.execute(
+        others.offset(max(position - 2, 0)).limit(2 if position > 1 else 1)
+    )).all()
+    if position > 1:
+        lo = neighbours[0].visit_order if neighbours else None
+        hi = neighbours[1].visit_order if len(neighbours) > 1 else None
+        if not neighbours:
+            # Past the end: append after the last place of the day
+            lo = await db.scalar(
+                select(func.max(models.ItineraryItem.visit_order))
+                .where(_same_day(itinerary_id, item.visit_date))
+            )
+    else:
+        lo = None
+        hi = neighbours[0].visit_order if neighbours else None
+
+    now = datetime.utcnow()
+    key = ordering.key_between(lo, hi)
+    if key is not None:
+        item.visit_order = key
+        item.updated_at = now
+        return
+
+    # Gap exhausted: renumber the whole day with fresh spacing
+    ids = [row.id for row in (await db.execute(others)).all()]
+    ids.insert(min(position - 1, len(ids)), item.id)
+    keys = dict(zip(ids, ordering.spaced_keys(len(ids))))
+    item.visit_order = keys.pop(item.id)
+    item.updated_at = now
+    await db.execute(
+        update(models.ItineraryItem),
+        [{"id": row_id, "visit_order": key, "updated_at": now} for row_id, key in keys.items()],
+    )
+
+
+async def place_position(db: AsyncSession, item: models.ItineraryItem) -> int:
+    """1-based position of an item within its day.
+    
+    A COUNT over the day's index range up to the item: O(position), bounded
+    by the size of one day.
+    """
+    before = await db.scalar(
+        select(func.count())
+        .where(
+            _same_day(item.itinerary_id, item.visit_date),
+            or_(
+                models.ItineraryItem.visit_order < item.visit_order,
+                and_(
+                    models.ItineraryItem.visit_order == item.visit_order,
+                    models.ItineraryItem.id < item.id
+                )
+            )
+        )
+    )
+    return before + 1
+
+
+async def get_owned_item(
+    db: AsyncSession, itinerary_id: int, item_id: int, user_id: int
+) -> Optional[models.ItineraryItem]:
+    return await _get_owned_child(db, models.ItineraryItem, itinerary_id, item_id, user_id)
+
+
 # Budgets
 async def add_budget(
     db: AsyncSession, itinerary_id: int, data: schemas.BudgetCreate
@@ -106,10 +463,149 @@ async def add_budget(
     return budget
 
 
-async def get_budgets(
-    db: AsyncSession, itinerary_id: int
+async def add_budgets(
+    db: AsyncSession, itinerary_id: int, data: Sequence[schemas.BudgetCreate]
 ) -> List[models.Budget]:
+    return await _bulk_insert(
+        db, models.Budget, itinerary_id, [d.model_dump() for d in data]
+    )
+
+
+async def update_budgets(
+    db: AsyncSession, itinerary_id: int, user_id: int, data: Sequence[schemas.BudgetUpdate]
+) -> Optional[List[models.Budget]]:
+    return await _bulk_update(
+        db, models.Budget, itinerary_id, user_id, [d.model_dump() for d in data]
+    )
+
+
+async def delete_budgets(
+    db: AsyncSession, itinerary_id: int, user_id: int, ids: Sequence[int]
+) -> int:
+    return await _bulk_delete(db, models.Budget, itinerary_id, user_id, ids)
+
+
+async def get_owned_budgets(
+    db: AsyncSession, itinerary_id: int, user_id: int
+) -> Optional[List[models.Budget]]:
+    return await _get_owned_children(
+        db, models.Budget, itinerary_id, user_id, _BUDGET_ORDER
+    )
+
+
+async def get_owned_budget(
+    db: AsyncSession, itinerary_id: int, budget_id: int, user_id: int
+) -> Optional[models.Budget]:
+    return await _get_owned_child(db, models.Budget, itinerary_id, budget_id, user_id)
+
+
+async def get_budget_totals(
+    db: AsyncSession, itinerary_id: int
+) -> Dict[str, list]:
+    """Budget totals per category, per day and per currency (GROUP BY in SQL)"""
+    total = func.sum(models.Budget.amount).label("total")
+    count = func.count(models.Budget.id).label("count")
+    day = func.date(models.Budget.spent_at).label("day")
+    scope = models.Budget.itinerary_id == itinerary_id
+    
+    by_category = await db.execute(
+        select(models.Budget.category, models.Budget.currency, total, count)
+        .where(scope)
+        .group_by(models.Budget.category, models.Budget.currency)
+        .order_by(models.Budget.category, models.Budget.currency)
+    )
+    by_day = await db.execute(
+        select(day, models.Budget.currency, total, count)
+        .where(scope)
+        .group_by(day, models.Budget.currency)
+        .order_by(day, models.Budget.currency)
+    )
+    by_currency = await db.execute(
+        select(models.Budget.currency, total, count)
+        .where(scope)
+        .group_by(models.Budget.currency)
+        .order_by(models.Budget.currency)
+    )
+    return {
+        "by_category": [row._asdict() for row in by_category],
+        "by_day": [row._asdict() for row in by_day],
+        "by_currency": [row._asdict() for row in by_currency],
+    }
+
+
+# Exchange-rate history
+async def save_exchange_rates(
+    db: AsyncSession, base: str, rate_date: date, rates: Dict[str, float]
+) -> None:
+    # Replace the day's snapshot in one transaction (portable upsert)
+    await db.execute(
+        delete(models.ExchangeRate).where(
+            models.ExchangeRate.base == base,
+            models.ExchangeRate.rate_date == rate_date,
+        )
+    )
+    await db.execute(
+        insert(models.ExchangeRate),
+        [
+            {"base": base, "quote": quote, "rate_date": rate_date, "rate": rate}
+            for quote, rate in rates.items()
+            if rate
+        ],
+    )
+    await db.commit()
+
+
+async def get_exchange_rate_on(
+    db: AsyncSession, base: str, quote: str, on_date: date
+) -> Optional[Tuple[float, date]]:
+    """Latest recorded base->quote rate on or before on_date"""
     result = await db.execute(
-        select(models.Budget).where(models.Budget.itinerary_id == itinerary_id)
+        select(models.ExchangeRate.rate, models.ExchangeRate.rate_date)
+        .where(
+            models.ExchangeRate.base == base,
+            models.ExchangeRate.quote == quote,
+            models.ExchangeRate.rate_date <= on_date,
+        )
+        .order_by(models.ExchangeRate.rate_date.desc())
+        .limit(1)
     )
-    return list(result.scalars().all())
+    row = result.first()
+    return (row.rate, row.rate_date) if row else None
+
+
+# Geocode cache
+async def get_geocodes(
+    db: AsyncSession, kind: str, cache_keys: Sequence[str], newer_than: datetime
+) -> Dict[str, Tuple[str, datetime]]:
+    """Unexpired (payload, created_at) per cache key, for the keys that have one"""
+    result = await db.execute(
+        select(
+            models.GeocodeCache.cache_key,
+            models.GeocodeCache.payload,
+            models.GeocodeCache.created_at,
+        ).where(
+            models.GeocodeCache.kind == kind,
+            models.GeocodeCache.cache_key.in_(cache_keys),
+            models.GeocodeCache.created_at > newer_than,
+        )
+    )
+    return {row.cache_key: (row.payload, row.created_at) for row in result}
+
+
+async def save_geocodes(db: AsyncSession, kind: str, payloads: Dict[str, str]) -> None:
+    # Replaces expired rows for the same keys (portable upsert)
+    await db.execute(
+        delete(models.GeocodeCache).where(
+            models.GeocodeCache.kind == kind,
+            models.GeocodeCache.cache_key.in_(list(payloads)),
+        )
+    )
+    now = datetime.utcnow()
+    await db.execute(
+        insert(models.GeocodeCache),
+        [
+            {"kind": kind, "cache_key": key, "payload": payload, "created_at": now}
+            for key, payload in payloads.items()
+        ],
+    )
+    await db.commit()
@@ -4,18 +4,35 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from jose import jwt, JWTError
+import httpx
 
 from .config import settings
-from . import db, models, schemas
+from . import cache, db, models, schemas, upstream
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
+# Authenticated-principal snapshots keyed by user id (per process, short TTL)
+principal_cache = cache.TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL)
+
 
 async def get_db() -> AsyncSession:
     async with db.AsyncSessionLocal() as session:
         yield session
 
 
+def get_http_client() -> httpx.AsyncClient:
+    return upstream.get_client()
+
+
+def check_bulk_size(count: int):
+    """Reject bulk requests over BULK_MAX_ROWS rows"""
+    if count > settings.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BULK_MAX_ROWS} rows per bulk request"
+        )
+
+
 def verify_jwt(token: str) -> schemas.TokenPayload:
     try:
         payload = jwt.decode(
@@ -31,18 +48,54 @@ def verify_jwt(token: str) -> schemas.TokenPayload:
         )
 
 
+def _token_user_id(token: str) -> int:
+    token_data = verify_jwt(token)
+    if token_data.sub is None:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    return token_data.sub
+
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """User id from a verified JWT, without a database round trip"""
+    return _token_user_id(token)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
 ) -> models.User:
-    token_data = verify_jwt(token)
-    if token_data.sub is None:
-        raise HTTPException(status_code=401, detail="Invalid token payload")
+    """Session-attached User row; use for routes that modify the user"""
+    user_id = _token_user_id(token)
     
     result = await db.execute(
-        select(models.User).where(models.User.id == token_data.sub)
+        select(models.User).where(models.User.id == user_id)
     )
     user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> schemas.UserRead:
+    """Read-only snapshot of the current user, served from principal_cache"""
+    user_id = _token_user_id(token)
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    
+    result = await db.execute(
+        select(models.User).where(models.User.id == user_id)
+    )
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    principal = schemas.UserRead.model_validate(user)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.delete(user_id)
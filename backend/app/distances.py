@@ -0,0 +1,138 @@
+# backend/app/distances.py
+"""Per-itinerary distance matrices, cached and patched as places change
+
+Each cached matrix covers the places of one itinerary. Reads reconcile it
+with the current place set (ids and coordinates) so only added, removed or
+moved places are recomputed: adding k places costs one (k x n) haversine
+pass instead of a full (n x n) rebuild.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from . import models, routing
+from .cache import TTLCache
+from .config import settings
+
+# (item id, latitude, longitude)
+Place = Tuple[int, float, float]
+
+
+class DistanceMatrix:
+    """Symmetric km distance matrix over a set of item ids"""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.index: Dict[int, int] = {}
+        self.lat = np.empty(0)
+        self.lon = np.empty(0)
+        self.dist = np.empty((0, 0))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, places: Sequence[Place]):
+        if not places:
+            return
+        n = len(self.ids)
+        new_ids = [p[0] for p in places]
+        lat = np.append(self.lat, [p[1] for p in places])
+        lon = np.append(self.lon, [p[2] for p in places])
+        # Only the new rows are computed; the old block is copied as is
+        rows = routing.haversine_cross(lat[n:], lon[n:], lat, lon)
+        dist = np.empty((len(lat), len(lat)))
+        dist[:n, :n] = self.dist
+        dist[n:, :] = rows
+        dist[:n, n:] = rows[:, :n].T
+        self.ids.extend(new_ids)
+        self.index = {item_id: i for i, item_id in enumerate(self.ids)}
+        self.lat, self.lon, self.dist = lat, lon, dist
+
+    def remove(self, ids: Sequence[int]):
+        drop = {self.index[i] for i in ids if i in self.index}
+        if not drop:
+            return
+        keep = np.array([i for i in range(len(self.ids)) if i not in drop], dtype=np.intp)
+        self.ids = [self.ids[i] for i in keep]
+        self.index = {item_id: i for i, item_id in enumerate(self.ids)}
+        self.lat, self.lon = self.lat[keep], self.lon[keep]
+        self.dist = self.dist[np.ix_(keep, keep)]
+
+    def sync(self, places: Sequence[Place], prune: bool = False) -> int:
+        """Patch so every place in ``places`` is present with its current
+        coordinates; with prune, also drop ids not in ``places``. Returns the
+        number of rows recomputed or dropped."""
+        current = {p[0]: p for p in places}
+        stale = [
+            item_id for item_id, i in self.index.items()
+            if (item_id not in current and prune)
+            or (item_id in current
+                and (current[item_id][1] != self.lat[i] or current[item_id][2] != self.lon[i]))
+        ]
+        self.remove(stale)
+        added = [p for item_id, p in current.items() if item_id not in self.index]
+        self.add(added)
+        return len(stale) + len(added)
+
+    def submatrix(self, ids: Sequence[int]) -> np.ndarray:
+        idx = np.fromiter((self.index[i] for i in ids), dtype=np.intp, count=len(ids))
+        return self.dist[np.ix_(idx, idx)]
+
+    def legs(self, ids: Sequence[int]) -> np.ndarray:
+        """Distances between consecutive ids"""
+        idx = np.fromiter((self.index[i] for i in ids), dtype=np.intp, count=len(ids))
+        return self.dist[idx[:-1], idx[1:]]
+
+
+def _places(items: Sequence[models.ItineraryItem]) -> List[Place]:
+    return [(item.id, item.latitude, item.longitude) for item in items]
+
+
+class DistanceCache:
+    """Bounded per-itinerary cache of DistanceMatrix objects"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._matrices = TTLCache(maxsize, ttl)
+        self.rebuilds = 0
+        self.patched_rows = 0
+
+    def get(
+        self, itinerary_id: int, items: Sequence[models.ItineraryItem], complete: bool = False
+    ) -> DistanceMatrix:
+        """Matrix covering ``items``, patched in place if they changed.
+
+        Pass complete=True when ``items`` is the itinerary's whole place set
+        so rows of places deleted elsewhere are dropped too.
+        """
+        matrix = self._matrices.get(itinerary_id)
+        if matrix is None:
+            matrix = DistanceMatrix()
+            self.rebuilds += 1
+            self._matrices.set(itinerary_id, matrix)
+        self.patched_rows += matrix.sync(_places(items), prune=complete)
+        return matrix
+
+    def place_added(self, itinerary_id: int, item: models.ItineraryItem):
+        matrix = self._matrices.get(itinerary_id)
+        if matrix is not None:
+            self.patched_rows += matrix.sync(_places([item]))
+
+    def places_removed(self, itinerary_id: int, ids: Sequence[int]):
+        matrix = self._matrices.get(itinerary_id)
+        if matrix is not None:
+            matrix.remove(ids)
+
+    def invalidate(self, itinerary_id: int):
+        self._matrices.delete(itinerary_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._matrices.stats(),
+            "rebuilds": self.rebuilds,
+            "patched_rows": self.patched_rows,
+        }
+
+
+distance_cache = DistanceCache(
+    settings.DISTANCE_CACHE_MAX_ITINERARIES, settings.DISTANCE_CACHE_TTL
+)
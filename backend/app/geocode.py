@@ -0,0 +1,94 @@
+# backend/app/geocode.py
+"""Geocoding results cached per process and in the geocode_cache table
+
+Lookups check the in-memory LRU first, then the database, which is shared by
+every worker and survives restarts. Only successful upstream results are
+stored; both tiers expire entries after GEOCODE_CACHE_TTL.
+"""
+import json
+import logging
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import cache, crud
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+REVERSE = "reverse"
+ADDRESS = "address"
+
+_memory = cache.TTLCache(settings.GEOCODE_CACHE_MAX_ENTRIES, settings.GEOCODE_CACHE_TTL)
+_db_hits = 0
+_db_misses = 0
+
+
+def round_coord(value: float) -> float:
+    return round(value, settings.GEOCODE_PRECISION)
+
+
+def coord_key(x: float, y: float) -> str:
+    """Reverse-geocode key: longitude,latitude at GEOCODE_PRECISION decimals"""
+    p = settings.GEOCODE_PRECISION
+    return f"{round_coord(x):.{p}f},{round_coord(y):.{p}f}"
+
+
+def normalize_address(query: str) -> str:
+    """Forward-geocode key: width-folded, single-spaced, lower-cased"""
+    return " ".join(unicodedata.normalize("NFKC", query).split()).lower()
+
+
+async def get_many(
+    db: AsyncSession, kind: str, keys: Sequence[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Cached values for the keys that have one; one query for all memory misses"""
+    global _db_hits, _db_misses
+    keys = list(dict.fromkeys(keys))
+    found = {}
+    for key in keys:
+        value = _memory.get((kind, key))
+        if value is not None:
+            found[key] = value
+    missing = [key for key in keys if key not in found]
+    if not missing:
+        return found
+    ttl = settings.GEOCODE_CACHE_TTL
+    now = datetime.utcnow()
+    rows = await crud.get_geocodes(db, kind, missing, now - timedelta(seconds=ttl))
+    _db_hits += len(rows)
+    _db_misses += len(missing) - len(rows)
+    for key, (payload, created_at) in rows.items():
+        found[key] = json.loads(payload)
+        _memory.set((kind, key), found[key], ttl - (now - created_at).total_seconds())
+    return found
+
+
+async def get(db: AsyncSession, kind: str, key: str) -> Optional[Dict[str, Any]]:
+    return (await get_many(db, kind, [key])).get(key)
+
+
+async def put_many(db: AsyncSession, kind: str, values: Dict[str, Dict[str, Any]]):
+    if not values:
+        return
+    for key, value in values.items():
+        _memory.set((kind, key), value)
+    try:
+        await crud.save_geocodes(
+            db, kind, {key: json.dumps(value, ensure_ascii=False) for key, value in values.items()}
+        )
+    except SQLAlchemyError as e:
+        # A concurrent writer may have stored the same key; memory still has it
+        await db.rollback()
+        logger.warning("Saving geocode cache entries failed: %s", e)
+
+
+async def put(db: AsyncSession, kind: str, key: str, value: Dict[str, Any]):
+    await put_many(db, kind, {key: value})
+
+
+def stats() -> Dict[str, Any]:
+    return {**_memory.stats(), "db_hits": _db_hits, "db_misses": _db_misses}
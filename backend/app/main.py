@@ -5,16 +5,24 @@ from contextlib import asynccontextmanager
 
 from .config import settings
 from .db import init_db
+from . import cache, deps, distances, geocode, rates, singleflight, spatial, upstream
 from .routers import auth, users, itineraries, items, budgets, search, exchange
 from .routers import tour, currency, kakao, delivery, places, itinerary_full
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize database
+    # Startup: Initialize database, shared upstream HTTP client and cache tier
     await init_db()
+    await upstream.init_client()
+    await cache.init_redis()
+    rates.rate_cache.start()
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: stop background refresh, close the cache tier and release
+    # pooled upstream connections
+    await rates.rate_cache.stop()
+    await cache.close_redis()
+    await upstream.close_client()
 
 
 app = FastAPI(
@@ -60,3 +68,15 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/health/cache")
+async def cache_stats():
+    stats = {name: c.stats() for name, c in cache.caches.items()}
+    stats["exchange_rates"] = rates.rate_cache.stats()
+    stats["principals"] = deps.principal_cache.stats()
+    stats["distances"] = distances.distance_cache.stats()
+    stats["geocode"] = geocode.stats()
+    stats["spatial_index"] = spatial.place_index.stats()
+    stats["single_flight"] = singleflight.upstream_flight.stats()
+    return stats
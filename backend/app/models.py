@@ -1,7 +1,7 @@
 # backend/app/models.py
 from sqlalchemy import (
     Column, Integer, String, Date, DateTime, Float, Text,
-    ForeignKey, Enum, UniqueConstraint
+    ForeignKey, Enum, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -47,13 +47,26 @@ class Itinerary(Base):
     description = Column(Text, nullable=True)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
+    destination = Column(String(200), nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # get_itineraries: WHERE user_id = ? ORDER BY start_date DESC, id DESC
+        Index("ix_itineraries_user_start_date", user_id, start_date.desc(), id.desc()),
+    )
+    
     owner = relationship("User", back_populates="itineraries")
-    items = relationship("ItineraryItem", back_populates="itinerary", cascade="all,delete")
-    budgets = relationship("Budget", back_populates="itinerary", cascade="all,delete")
+    # Collection order matches the item/budget indexes so eager loads need no sort
+    items = relationship(
+        "ItineraryItem", back_populates="itinerary", cascade="all,delete",
+        order_by="[ItineraryItem.visit_date, ItineraryItem.visit_order, ItineraryItem.id]",
+    )
+    budgets = relationship(
+        "Budget", back_populates="itinerary", cascade="all,delete",
+        order_by="[Budget.spent_at, Budget.id]",
+    )
 
 
 class ItineraryItem(Base):
@@ -62,17 +75,28 @@ class ItineraryItem(Base):
     id = Column(Integer, primary_key=True, index=True)
     itinerary_id = Column(Integer, ForeignKey("itineraries.id", ondelete="CASCADE"), nullable=False)
     place_name = Column(String(255), nullable=False)
+    place_name_kr = Column(String(255), nullable=True)
+    address = Column(Text, nullable=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     visit_date = Column(Date, nullable=True)
     visit_order = Column(Integer, nullable=True)
+    visit_time = Column(String(5), nullable=True)  # HH:MM
     memo = Column(Text, nullable=True)
     place_type = Column(String(50), nullable=True)
     kakao_place_id = Column(String(255), nullable=True)
+    external_place_id = Column(String(255), nullable=True)  # TourAPI content id etc.
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # get_owned_items / items eager load: WHERE itinerary_id = ? ORDER BY visit_date, visit_order
+        Index("ix_itinerary_items_itinerary_visit", itinerary_id, visit_date, visit_order),
+        # Place lookups by external id in the /api/itineraries router
+        Index("ix_itinerary_items_itinerary_place", itinerary_id, external_place_id),
+    )
+    
     itinerary = relationship("Itinerary", back_populates="items")
 
 
@@ -90,4 +114,43 @@ class Budget(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # get_owned_budgets, budgets eager load and the per-day summary: WHERE itinerary_id = ? ORDER BY spent_at
+        Index("ix_budgets_itinerary_spent_at", itinerary_id, spent_at),
+    )
+    
     itinerary = relationship("Itinerary", back_populates="budgets")
+
+
+class ExchangeRate(Base):
+    """Daily snapshot of anchor-currency rates recorded by the refresh loop"""
+    __tablename__ = "exchange_rates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    base = Column(String(3), nullable=False)
+    quote = Column(String(3), nullable=False)
+    rate_date = Column(Date, nullable=False)
+    rate = Column(Float, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Also serves (base, quote, rate_date <= ?) lookups
+        UniqueConstraint("base", "quote", "rate_date", name="uq_exchange_rate_day"),
+    )
+
+
+class GeocodeCache(Base):
+    """Geocoding results shared across users, workers and restarts"""
+    __tablename__ = "geocode_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(16), nullable=False)  # "reverse" or "address"
+    cache_key = Column(String(255), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("kind", "cache_key", name="uq_geocode_cache_key"),
+    )
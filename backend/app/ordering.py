@@ -0,0 +1,29 @@
+# backend/app/ordering.py
+"""Gapped integer ordering keys for itinerary places
+
+Keys are spaced GAP apart, so a place can be appended or moved between two
+neighbours by writing a single row. Only when two neighbours are adjacent
+integers does the day need renumbering (rebalance), which is rare and
+amortizes to O(1) per move.
+"""
+from typing import List, Optional
+
+GAP = 1024
+
+
+def key_after(last: Optional[int]) -> int:
+    return (last or 0) + GAP
+
+
+def key_between(lo: Optional[int], hi: Optional[int]) -> Optional[int]:
+    """A key strictly between lo and hi, or None when the gap is exhausted"""
+    lo = lo or 0
+    if hi is None:
+        return lo + GAP
+    if hi - lo > 1:
+        return (lo + hi) // 2
+    return None
+
+
+def spaced_keys(count: int) -> List[int]:
+    return [GAP * (i + 1) for i in range(count)]
@@ -0,0 +1,23 @@
+# backend/app/pagination.py
+"""Opaque keyset cursors for listings ordered by (start_date DESC, id DESC)"""
+import base64
+import json
+from datetime import date
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(start_date: date, row_id: int) -> str:
+    raw = json.dumps([start_date.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Inverse of encode_cursor; 400 on anything that did not come from it"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_date, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return date.fromisoformat(start_date), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,294 @@
+# backend/app/rates.py
+"""Shared exchange-rate provider: one cache, one refresh loop, one upstream client
+
+Both /api/currency/* and /api/v1/exchange/* read rates through this module.
+Tables are kept with stale-while-revalidate semantics and, when the Redis
+tier is enabled, upstream responses are shared across workers so each base
+is fetched at most once per refresh window per deployment.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import cache, crud, db, upstream
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Every cross rate is derived from this one upstream table
+ANCHOR_CURRENCY = "USD"
+
+# Anchor table used when no API key is configured (development)
+MOCK_ANCHOR_RATES = {
+    "USD": 1.0,
+    "KRW": 1330.0,
+    "EUR": 0.917,
+    "JPY": 146.2,
+    "CNY": 7.19,
+    "GBP": 0.787,
+}
+
+
+class UnsupportedCurrencyError(ValueError):
+    pass
+
+
+class RateHistoryNotFoundError(LookupError):
+    pass
+
+
+@dataclass
+class RateTable:
+    base: str
+    rates: Dict[str, float]
+    updated_at: str  # upstream time_last_update_utc
+    updated_unix: int
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class RateMatrix:
+    """Cross rates for any currency pair, computed locally from one anchor table"""
+
+    def __init__(self, table: RateTable, mock: bool = False):
+        self.table = table
+        self.mock = mock
+        self.codes = [code for code, rate in table.rates.items() if rate]
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.vector = np.array([table.rates[code] for code in self.codes], dtype=np.float64)
+
+    def _indices(self, codes: Sequence[str]) -> np.ndarray:
+        try:
+            return np.fromiter((self.index[c.upper()] for c in codes), dtype=np.intp, count=len(codes))
+        except KeyError as e:
+            raise UnsupportedCurrencyError(e.args[0])
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        rates = self.table.rates
+        from_currency = from_currency.upper()
+        to_currency = to_currency.upper()
+        for code in (from_currency, to_currency):
+            if not rates.get(code):
+                raise UnsupportedCurrencyError(code)
+        # anchor->to divided by anchor->from gives from->to
+        return rates[to_currency] / rates[from_currency]
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        return amount * self.rate(from_currency, to_currency)
+
+    def rates_many(self, from_codes: Sequence[str], to_codes: Sequence[str]) -> np.ndarray:
+        """Vectorized cross rates for aligned sequences of currency codes"""
+        return self.vector[self._indices(to_codes)] / self.vector[self._indices(from_codes)]
+
+
+class RateCache:
+    """Bounded per-base cache of rate tables.
+
+    Tables older than ``refresh_interval`` are refreshed in the background
+    while the cached copy keeps being served; only a miss or a table older
+    than ``max_stale`` makes the caller wait for upstream.
+    """
+
+    def __init__(self, maxsize: int, refresh_interval: float, max_stale: float):
+        self.maxsize = maxsize
+        self.refresh_interval = refresh_interval
+        self.max_stale = max_stale
+        self._tables: "OrderedDict[str, RateTable]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def _fetch(self, base: str) -> RateTable:
+        # Entries carry their upstream fetch time so a table loaded from
+        # another worker keeps its true age
+        key = f"fetched:{base}"
+        entry = await cache.rates_cache.get(key)
+        if entry is None:
+            data = await upstream.get_json(
+                upstream.get_client(),
+                f"{settings.EXCHANGE_RATE_API_URL}/{settings.EXCHANGE_RATE_API_KEY}/latest/{base}",
+                flight_key=f"rates:latest:{base}",
+            )
+            entry = {"fetched_at": time.time(), "data": data}
+            # Shared with other workers through the Redis tier when enabled
+            await cache.rates_cache.set(key, entry, self.refresh_interval / 2)
+        data = entry["data"]
+        return RateTable(
+            base=data["base_code"],
+            rates=data["conversion_rates"],
+            updated_at=data["time_last_update_utc"],
+            updated_unix=data["time_last_update_unix"],
+            fetched_at=entry["fetched_at"],
+        )
+
+    def _store(self, table: RateTable):
+        self._tables[table.base] = table
+        self._tables.move_to_end(table.base)
+        while len(self._tables) > self.maxsize:
+            self._tables.popitem(last=False)
+
+    async def _load(self, base: str) -> RateTable:
+        table = await self._fetch(base)
+        self._store(table)
+        if table.base == ANCHOR_CURRENCY:
+            await record_history(table)
+        return table
+
+    async def _refresh(self, base: str):
+        try:
+            await self._load(base)
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning("Exchange rate refresh for %s failed: %s", base, e)
+
+    def _refresh_in_background(self, base: str):
+        if base in self._refreshing:
+            return
+        task = asyncio.ensure_future(self._refresh(base))
+        self._refreshing[base] = task
+        task.add_done_callback(lambda t: self._refreshing.pop(base, None))
+
+    async def get(self, base: str) -> RateTable:
+        base = base.upper()
+        table = self._tables.get(base)
+        if table is None or table.age >= self.max_stale:
+            self.misses += 1
+            return await self._load(base)
+        self._tables.move_to_end(base)
+        if table.age >= self.refresh_interval:
+            self.stale_hits += 1
+            self._refresh_in_background(base)
+        else:
+            self.hits += 1
+        return table
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(settings.EXCHANGE_RATE_REFRESH_CHECK)
+            # Refresh ahead of expiry so request paths rarely see a stale table
+            due = [
+                base for base, table in self._tables.items()
+                if table.age >= self.refresh_interval * 0.9
+            ]
+            for base in due:
+                await self._refresh(base)
+
+    def start(self):
+        if self._loop_task is None:
+            self._loop_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop(self):
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        ages = {base: round(table.age, 1) for base, table in self._tables.items()}
+        return {
+            "size": len(self._tables),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "max_age_seconds": max(ages.values(), default=0),
+            "age_seconds": ages,
+        }
+
+
+rate_cache = RateCache(
+    settings.EXCHANGE_RATE_CACHE_MAX_BASES,
+    settings.EXCHANGE_RATE_REFRESH_INTERVAL,
+    settings.EXCHANGE_RATE_MAX_STALE,
+)
+
+
+_mock_matrix = RateMatrix(
+    RateTable(ANCHOR_CURRENCY, MOCK_ANCHOR_RATES, "", 0, time.time()),
+    mock=True,
+)
+_matrix: Optional[RateMatrix] = None
+
+
+def is_configured() -> bool:
+    return bool(settings.EXCHANGE_RATE_API_KEY)
+
+
+async def get_table(base: str) -> RateTable:
+    """Return the rate table for ``base`` (derived from mock rates if unconfigured)"""
+    if not is_configured():
+        base = base.upper()
+        rates = {code: _mock_matrix.rate(base, code) for code in MOCK_ANCHOR_RATES}
+        return RateTable(base, rates, "", int(time.time()), time.time())
+    return await rate_cache.get(base)
+
+
+async def get_matrix() -> RateMatrix:
+    """Return the cross-rate matrix built on the cached anchor table"""
+    global _matrix
+    if not is_configured():
+        return _mock_matrix
+    table = await rate_cache.get(ANCHOR_CURRENCY)
+    # Rebuild only when the anchor table has been refreshed
+    if _matrix is None or _matrix.table is not table:
+        _matrix = RateMatrix(table)
+    return _matrix
+
+
+_history_recorded: Dict[str, date] = {}
+
+
+async def record_history(table: RateTable):
+    """Persist the day's snapshot of an anchor table (once per day per worker)"""
+    if not settings.EXCHANGE_RATE_HISTORY_ENABLED:
+        return
+    rate_date = datetime.fromtimestamp(table.updated_unix, tz=timezone.utc).date()
+    if _history_recorded.get(table.base) == rate_date:
+        return
+    try:
+        async with db.AsyncSessionLocal() as session:
+            await crud.save_exchange_rates(session, table.base, rate_date, table.rates)
+        _history_recorded[table.base] = rate_date
+    except Exception as e:
+        logger.warning("Recording exchange rate history failed: %s", e)
+
+
+async def historical_rate(
+    session: AsyncSession, from_currency: str, to_currency: str, on_date: date
+) -> Tuple[float, Optional[date]]:
+    """Cross rate from the latest recorded snapshots on or before on_date"""
+    from_currency = from_currency.upper()
+    to_currency = to_currency.upper()
+    if from_currency == to_currency:
+        return 1.0, None
+    legs = []
+    for code in (from_currency, to_currency):
+        if code == ANCHOR_CURRENCY:
+            legs.append((1.0, None))
+            continue
+        found = await crud.get_exchange_rate_on(session, ANCHOR_CURRENCY, code, on_date)
+        if found is None:
+            raise RateHistoryNotFoundError(code)
+        legs.append(found)
+    rate_dates = [d for _, d in legs if d is not None]
+    return legs[1][0] / legs[0][0], min(rate_dates)
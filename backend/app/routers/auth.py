@@ -27,6 +27,7 @@ def _create_jwt(user_id: int, expires_delta: timedelta):
 async def google_login(
     request: Request,
     db: AsyncSession = Depends(deps.get_db),
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
     code: str = None,
 ):
     """
@@ -44,18 +45,17 @@ async def google_login(
         "grant_type": "authorization_code",
     }
     
-    async with httpx.AsyncClient() as client:
-        token_resp = await client.post(token_url, data=payload, timeout=10)
-        if token_resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Invalid authorization code")
-        token_data = token_resp.json()
-        
-        # Decode ID token
-        id_token = token_data["id_token"]
-        id_info = jwt.decode(
-            id_token,
-            options={"verify_signature": False},
-        )
+    token_resp = await client.post(token_url, data=payload, timeout=10)
+    if token_resp.status_code != 200:
+        raise HTTPException(status_code=400, detail="Invalid authorization code")
+    token_data = token_resp.json()
+    
+    # Decode ID token
+    id_token = token_data["id_token"]
+    id_info = jwt.decode(
+        id_token,
+        options={"verify_signature": False},
+    )
     
     # Get or create user
     social_id = id_info["sub"]
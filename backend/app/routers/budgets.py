@@ -1,9 +1,10 @@
 # backend/app/routers/budgets.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+import httpx
 
-from .. import schemas, crud, deps, models
+from .. import schemas, crud, deps, rates
 
 router = APIRouter(prefix="/itineraries/{itinerary_id}/budgets", tags=["budgets"])
 
@@ -11,22 +12,22 @@ router = APIRouter(prefix="/itineraries/{itinerary_id}/budgets", tags=["budgets"
 async def _verify_owner(
     itinerary_id: int,
     db: AsyncSession,
-    user: models.User
+    user_id: int
 ):
-    it = await crud.get_itinerary(db, itinerary_id, user.id)
-    if not it:
+    if not await crud.owns_itinerary(db, itinerary_id, user_id):
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    return it
 
 
 @router.get("/", response_model=List[schemas.BudgetRead])
 async def list_budgets(
     itinerary_id: int,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    await _verify_owner(itinerary_id, db, user)
-    return await crud.get_budgets(db, itinerary_id)
+    rows = await crud.get_owned_budgets(db, itinerary_id, user_id)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return rows
 
 
 @router.post("/", response_model=schemas.BudgetRead, status_code=201)
@@ -34,7 +35,114 @@ async def create_budget(
     itinerary_id: int,
     data: schemas.BudgetCreate,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    await _verify_owner(itinerary_id, db, user)
+    await _verify_owner(itinerary_id, db, user_id)
     return await crud.add_budget(db, itinerary_id, data)
+
+
+@router.post("/bulk", response_model=List[schemas.BudgetRead], status_code=201)
+async def create_budgets_bulk(
+    itinerary_id: int,
+    data: List[schemas.BudgetCreate],
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    """Create many budget entries with a single INSERT ... RETURNING"""
+    deps.check_bulk_size(len(data))
+    await _verify_owner(itinerary_id, db, user_id)
+    return await crud.add_budgets(db, itinerary_id, data)
+
+
+@router.put("/bulk", response_model=List[schemas.BudgetRead])
+async def update_budgets_bulk(
+    itinerary_id: int,
+    data: List[schemas.BudgetUpdate],
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    deps.check_bulk_size(len(data))
+    budgets = await crud.update_budgets(db, itinerary_id, user_id, data)
+    if budgets is None:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    return budgets
+
+
+@router.delete("/bulk", status_code=204)
+async def delete_budgets_bulk(
+    itinerary_id: int,
+    ids: List[int] = Query(...),
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    deps.check_bulk_size(len(ids))
+    await crud.delete_budgets(db, itinerary_id, user_id, ids)
+
+
+@router.get("/summary", response_model=schemas.BudgetSummary)
+async def budget_summary(
+    itinerary_id: int,
+    convert: bool = Query(False, description="Convert totals into the user's currency"),
+    db: AsyncSession = Depends(deps.get_db),
+    user: schemas.UserRead = Depends(deps.get_current_principal),
+):
+    """Totals per category, day and currency, aggregated in the database"""
+    await _verify_owner(itinerary_id, db, user.id)
+    totals = await crud.get_budget_totals(db, itinerary_id)
+    summary = schemas.BudgetSummary(**totals)
+    if not convert:
+        return summary
+    
+    target = user.currency_code or "USD"
+    try:
+        matrix = await rates.get_matrix()
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Exchange rates unavailable")
+    
+    for row in summary.by_category + summary.by_day + summary.by_currency:
+        try:
+            row.converted_total = round(matrix.convert(row.total, row.currency, target), 2)
+        except rates.UnsupportedCurrencyError:
+            row.converted_total = None
+    summary.converted_currency = target
+    summary.converted_grand_total = round(
+        sum(row.converted_total for row in summary.by_currency if row.converted_total is not None),
+        2,
+    )
+    return summary
+
+
+@router.get("/{budget_id}/convert", response_model=schemas.BudgetConversion)
+async def convert_budget(
+    itinerary_id: int,
+    budget_id: int,
+    to_currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    db: AsyncSession = Depends(deps.get_db),
+    user: schemas.UserRead = Depends(deps.get_current_principal),
+):
+    """Convert a budget entry at the recorded rate of its spent_at date"""
+    budget = await crud.get_owned_budget(db, itinerary_id, budget_id, user.id)
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    
+    target = (to_currency or user.currency_code or "USD").upper()
+    try:
+        rate, rate_date = await rates.historical_rate(
+            db, budget.currency, target, budget.spent_at.date()
+        )
+    except rates.RateHistoryNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No exchange rate recorded for {e} on or before {budget.spent_at.date()}"
+        )
+    
+    return schemas.BudgetConversion(
+        budget_id=budget.id,
+        amount=budget.amount,
+        currency=budget.currency,
+        spent_at=budget.spent_at,
+        to_currency=target,
+        rate=rate,
+        rate_date=rate_date,
+        converted_amount=round(budget.amount * rate, 2),
+    )
@@ -1,75 +1,60 @@
 """Currency exchange rate API integration"""
 import httpx
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-import os
-from datetime import datetime, timedelta
-import json
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+import numpy as np
+
+from .. import rates
 
 router = APIRouter(prefix="/api/currency", tags=["currency"])
 
-EXCHANGE_API_KEY = os.getenv("EXCHANGE_API_KEY", "")
-BASE_URL = "https://v6.exchangerate-api.com/v6"
+MAX_BATCH_SIZE = 1000
+
+
+class ConversionItem(BaseModel):
+    amount: float
+    from_currency: str
+    to_currency: str
+
 
-# Simple in-memory cache (for production, use Redis)
-cache = {}
-CACHE_DURATION = 3600  # 1 hour
+class BatchConvertRequest(BaseModel):
+    # Either a list of (amount, from, to) items...
+    items: Optional[List[ConversionItem]] = Field(None, max_length=MAX_BATCH_SIZE)
+    # ...or many amounts for a single pair
+    amounts: Optional[List[float]] = Field(None, max_length=MAX_BATCH_SIZE)
+    from_currency: Optional[str] = None
+    to_currency: Optional[str] = None
 
 
 @router.get("/rates")
 async def get_exchange_rates(base: str = Query("KRW", description="Base currency code")):
     """Get current exchange rates for base currency"""
     
-    cache_key = f"exchange_rates:{base}"
-    current_time = datetime.now()
-    
-    # Check cache
-    if cache_key in cache:
-        cached_data, cached_time = cache[cache_key]
-        if (current_time - cached_time).total_seconds() < CACHE_DURATION:
-            return cached_data
-    
-    if not EXCHANGE_API_KEY:
-        # Return mock data if API key not configured
-        return {
-            "base": base,
-            "updated_at": current_time.isoformat(),
-            "rates": {
-                "USD": 0.00075 if base == "KRW" else 1330.0,
-                "EUR": 0.00069 if base == "KRW" else 1450.0,
-                "JPY": 0.11 if base == "KRW" else 9.1,
-                "CNY": 0.0054 if base == "KRW" else 185.0,
-                "GBP": 0.00059 if base == "KRW" else 1690.0,
-            },
-            "mock": True
-        }
-    
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{BASE_URL}/{EXCHANGE_API_KEY}/latest/{base}")
-            response.raise_for_status()
-            data = response.json()
-            
-            result = {
-                "base": base,
-                "updated_at": data["time_last_update_utc"],
-                "rates": {
-                    "USD": data["conversion_rates"].get("USD", 0),
-                    "EUR": data["conversion_rates"].get("EUR", 0),
-                    "JPY": data["conversion_rates"].get("JPY", 0),
-                    "CNY": data["conversion_rates"].get("CNY", 0),
-                    "GBP": data["conversion_rates"].get("GBP", 0),
-                    "KRW": data["conversion_rates"].get("KRW", 0),
-                },
-                "mock": False
-            }
-            
-            # Update cache
-            cache[cache_key] = (result, current_time)
-            
-            return result
+        # Shared rate provider; stale tables are refreshed in the background.
+        # Without an API key the table is derived from mock anchor rates.
+        table = await rates.get_table(base)
+    except rates.UnsupportedCurrencyError as e:
+        raise HTTPException(status_code=400, detail=f"Unsupported currency: {e}")
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch exchange rates: {str(e)}")
+    
+    mock = not rates.is_configured()
+    return {
+        "base": base,
+        "updated_at": datetime.now().isoformat() if mock else table.updated_at,
+        "rates": {
+            "USD": table.rates.get("USD", 0),
+            "EUR": table.rates.get("EUR", 0),
+            "JPY": table.rates.get("JPY", 0),
+            "CNY": table.rates.get("CNY", 0),
+            "GBP": table.rates.get("GBP", 0),
+            "KRW": table.rates.get("KRW", 0),
+        },
+        "mock": mock
+    }
 
 
 @router.get("/convert")
@@ -80,47 +65,68 @@ async def convert_currency(
 ):
     """Convert amount from one currency to another"""
     
-    if not EXCHANGE_API_KEY:
-        # Mock conversion for development
-        mock_rates = {
-            "KRW_USD": 0.00075,
-            "USD_KRW": 1330.0,
-            "KRW_EUR": 0.00069,
-            "EUR_KRW": 1450.0,
-            "KRW_JPY": 0.11,
-            "JPY_KRW": 9.1,
-        }
-        
-        rate_key = f"{from_currency}_{to_currency}"
-        rate = mock_rates.get(rate_key, 1.0)
-        
-        return {
-            "from": from_currency,
-            "to": to_currency,
-            "amount": amount,
-            "converted_amount": round(amount * rate, 2),
-            "rate": rate,
-            "mock": True
-        }
+    try:
+        # Cross rate from the cached anchor table; no upstream call per conversion
+        matrix = await rates.get_matrix()
+        rate = matrix.rate(from_currency, to_currency)
+    except rates.UnsupportedCurrencyError as e:
+        raise HTTPException(status_code=400, detail=f"Unsupported currency: {e}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to convert currency: {str(e)}")
+    
+    return {
+        "from": from_currency,
+        "to": to_currency,
+        "amount": amount,
+        "converted_amount": round(amount * rate, 2),
+        "rate": rate,
+        "mock": matrix.mock
+    }
+
+
+@router.post("/convert/batch")
+async def convert_currency_batch(data: BatchConvertRequest):
+    """Convert many amounts in one request using the cached rate matrix"""
+    
+    if data.items is not None:
+        amounts = [item.amount for item in data.items]
+        from_codes = [item.from_currency for item in data.items]
+        to_codes = [item.to_currency for item in data.items]
+    elif data.amounts is not None and data.from_currency and data.to_currency:
+        amounts = data.amounts
+        from_codes = [data.from_currency] * len(amounts)
+        to_codes = [data.to_currency] * len(amounts)
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide either items or amounts with from_currency and to_currency"
+        )
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/{EXCHANGE_API_KEY}/pair/{from_currency}/{to_currency}/{amount}"
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "from": from_currency,
-                "to": to_currency,
-                "amount": amount,
-                "converted_amount": round(data["conversion_result"], 2),
-                "rate": data["conversion_rate"],
-                "mock": False
-            }
+        matrix = await rates.get_matrix()
+        rate_vector = matrix.rates_many(from_codes, to_codes)
+    except rates.UnsupportedCurrencyError as e:
+        raise HTTPException(status_code=400, detail=f"Unsupported currency: {e}")
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to convert currency: {str(e)}")
+    
+    converted = np.round(np.asarray(amounts, dtype=np.float64) * rate_vector, 2)
+    
+    return {
+        "results": [
+            {
+                "from": from_code,
+                "to": to_code,
+                "amount": amount,
+                "converted_amount": converted_amount,
+                "rate": rate
+            }
+            for from_code, to_code, amount, converted_amount, rate in zip(
+                from_codes, to_codes, amounts, converted.tolist(), rate_vector.tolist()
+            )
+        ],
+        "mock": matrix.mock
+    }
 
 
 @router.get("/supported")
@@ -3,8 +3,7 @@ from fastapi import APIRouter, Query, HTTPException
 from datetime import datetime
 import httpx
 
-from .. import schemas
-from ..config import settings
+from .. import schemas, rates
 
 router = APIRouter(prefix="/exchange", tags=["exchange"])
 
@@ -17,25 +16,29 @@ async def get_rates(
     """
     Get exchange rates from ExchangeRate-API
     Official docs: https://www.exchangerate-api.com/docs/overview
-    """
-    url = f"{settings.EXCHANGE_RATE_API_URL}/{settings.EXCHANGE_RATE_API_KEY}/latest/{base_currency}"
     
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, timeout=7)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail="ExchangeRate API error")
-        payload = resp.json()
+    Served from the shared rate provider (same cache as /api/currency/rates);
+    unlike that endpoint it never falls back to mock rates.
+    """
+    if not rates.is_configured():
+        raise HTTPException(status_code=502, detail="ExchangeRate API error")
+    try:
+        table = await rates.get_table(base_currency)
+    except rates.UnsupportedCurrencyError:
+        raise HTTPException(status_code=400, detail="Unsupported base currency")
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="ExchangeRate API error")
     
     # Filter only requested currencies
     targets = [c.strip().upper() for c in target_currencies.split(",")]
     filtered = {
-        c: payload["conversion_rates"].get(c)
+        c: table.rates.get(c)
         for c in targets
-        if payload["conversion_rates"].get(c)
+        if table.rates.get(c)
     }
     
     return schemas.ExchangeRateResponse(
-        base=payload["base_code"],
+        base=table.base,
         rates=filtered,
-        timestamp=datetime.fromtimestamp(payload["time_last_update_unix"]),
+        timestamp=datetime.fromtimestamp(table.updated_unix),
     )
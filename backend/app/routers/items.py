@@ -1,10 +1,12 @@
 # backend/app/routers/items.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from .. import schemas, crud, deps, models
+from .. import schemas, crud, deps, ordering, routing
+from ..distances import distance_cache
+from ..config import settings
 
 router = APIRouter(prefix="/itineraries/{itinerary_id}/items", tags=["items"])
 
@@ -12,22 +14,22 @@ router = APIRouter(prefix="/itineraries/{itinerary_id}/items", tags=["items"])
 async def _verify_owner(
     itinerary_id: int,
     db: AsyncSession,
-    user: models.User,
+    user_id: int,
 ):
-    it = await crud.get_itinerary(db, itinerary_id, user.id)
-    if not it:
+    if not await crud.owns_itinerary(db, itinerary_id, user_id):
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    return it
 
 
 @router.get("/", response_model=List[schemas.ItineraryItemRead])
 async def list_items(
     itinerary_id: int,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    await _verify_owner(itinerary_id, db, user)
-    return await crud.get_items(db, itinerary_id)
+    rows = await crud.get_owned_items(db, itinerary_id, user_id)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return rows
 
 
 @router.post("/", response_model=schemas.ItineraryItemRead, status_code=201)
@@ -35,10 +37,96 @@ async def create_item(
     itinerary_id: int,
     data: schemas.ItineraryItemCreate,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    await _verify_owner(itinerary_id, db, user_id)
+    item = await crud.add_item(db, itinerary_id, data)
+    return item
+
+
+@router.post("/bulk", response_model=List[schemas.ItineraryItemRead], status_code=201)
+async def create_items_bulk(
+    itinerary_id: int,
+    data: List[schemas.ItineraryItemCreate],
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    """Create many items with a single INSERT ... RETURNING"""
+    deps.check_bulk_size(len(data))
+    await _verify_owner(itinerary_id, db, user_id)
+    items = await crud.add_items(db, itinerary_id, data)
+    return items
+
+
+@router.put("/bulk", response_model=List[schemas.ItineraryItemRead])
+async def update_items_bulk(
+    itinerary_id: int,
+    data: List[schemas.ItineraryItemUpdate],
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    deps.check_bulk_size(len(data))
+    items = await crud.update_items(db, itinerary_id, user_id, data)
+    if items is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    distance_cache.invalidate(itinerary_id)
+    return items
+
+
+@router.delete("/bulk", status_code=204)
+async def delete_items_bulk(
+    itinerary_id: int,
+    ids: List[int] = Query(...),
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    await _verify_owner(itinerary_id, db, user)
-    return await crud.add_item(db, itinerary_id, data)
+    deps.check_bulk_size(len(ids))
+    await crud.delete_items(db, itinerary_id, user_id, ids)
+    distance_cache.places_removed(itinerary_id, ids)
+
+
+@router.post("/optimize", response_model=schemas.RouteOptimization)
+async def optimize_day(
+    itinerary_id: int,
+    visit_date: date = Query(..., description="Day to optimize (YYYY-MM-DD)"),
+    start_item_id: Optional[int] = Query(None, description="Fixed first stop; defaults to the current first"),
+    apply: bool = Query(False, description="Write the optimized visit_order back"),
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    """Shortest-walk visiting order for one day (nearest neighbour + 2-opt)"""
+    items = await crud.get_owned_items(db, itinerary_id, user_id, visit_date)
+    if items is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    if len(items) > settings.ROUTE_MAX_STOPS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.ROUTE_MAX_STOPS} stops per day can be optimized"
+        )
+    
+    start = 0
+    if start_item_id is not None:
+        start = next((i for i, item in enumerate(items) if item.id == start_item_id), None)
+        if start is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+    
+    ids = [item.id for item in items]
+    dist = distance_cache.get(itinerary_id, items).submatrix(ids)
+    order = routing.optimize_route(dist, start)
+    ordered = [items[i] for i in order]
+    
+    if apply:
+        for item, key in zip(ordered, ordering.spaced_keys(len(ordered))):
+            item.visit_order = key
+        await db.commit()
+    
+    return schemas.RouteOptimization(
+        visit_date=visit_date,
+        items=ordered,
+        distance_km=routing.path_length(dist, order),
+        original_distance_km=routing.path_length(dist, range(len(items))),
+        applied=apply,
+    )
 
 
 @router.put("/{item_id}", response_model=schemas.ItineraryItemRead)
@@ -47,16 +135,9 @@ async def update_item(
     item_id: int,
     data: schemas.ItineraryItemCreate,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    await _verify_owner(itinerary_id, db, user)
-    result = await db.execute(
-        select(models.ItineraryItem).where(
-            models.ItineraryItem.id == item_id,
-            models.ItineraryItem.itinerary_id == itinerary_id,
-        )
-    )
-    item = result.scalars().first()
+    item = await crud.get_owned_item(db, itinerary_id, item_id, user_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -64,6 +145,7 @@ async def update_item(
         setattr(item, attr, val)
     await db.commit()
     await db.refresh(item)
+    distance_cache.invalidate(itinerary_id)
     return item
 
 
@@ -72,17 +154,11 @@ async def delete_item(
     itinerary_id: int,
     item_id: int,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    await _verify_owner(itinerary_id, db, user)
-    result = await db.execute(
-        select(models.ItineraryItem).where(
-            models.ItineraryItem.id == item_id,
-            models.ItineraryItem.itinerary_id == itinerary_id,
-        )
-    )
-    item = result.scalars().first()
+    item = await crud.get_owned_item(db, itinerary_id, item_id, user_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     await db.delete(item)
     await db.commit()
+    distance_cache.places_removed(itinerary_id, [item_id])
@@ -1,28 +1,36 @@
 # backend/app/routers/itineraries.py
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .. import schemas, crud, deps, models
+from .. import schemas, crud, deps, pagination
 
 router = APIRouter(prefix="/itineraries", tags=["itineraries"])
 
 
-@router.get("/", response_model=List[schemas.ItineraryRead])
+@router.get("/", response_model=schemas.ItineraryPage)
 async def list_itineraries(
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    return await crud.get_itineraries(db, user.id, limit=limit, offset=offset)
+    after = pagination.decode_cursor(cursor) if cursor else None
+    # One extra row tells us whether another page exists
+    rows = await crud.get_itineraries(db, user_id, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pagination.encode_cursor(rows[-1].start_date, rows[-1].id)
+    return schemas.ItineraryPage(items=rows, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=schemas.ItineraryRead, status_code=201)
 async def create_itinerary(
     data: schemas.ItineraryCreate,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    # The row references users.id, so the user must exist (404 otherwise)
+    user: schemas.UserRead = Depends(deps.get_current_principal),
 ):
     return await crud.create_itinerary(db, user.id, data)
 
@@ -31,9 +39,22 @@ async def create_itinerary(
 async def read_itinerary(
     itinerary_id: int,
     db: AsyncSession = Depends(deps.get_db),
-    user: models.User = Depends(deps.get_current_user),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    it = await crud.get_itinerary(db, itinerary_id, user.id)
+    it = await crud.get_itinerary(db, itinerary_id, user_id)
+    if not it:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return it
+
+
+@router.get("/{itinerary_id}/full", response_model=schemas.ItineraryFullRead)
+async def read_itinerary_full(
+    itinerary_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    """Itinerary with its items and budgets in a single response"""
+    it = await crud.get_itinerary_full(db, itinerary_id, user_id)
     if not it:
         raise HTTPException(status_code=404, detail="Itinerary not found")
     return it
@@ -2,14 +2,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, date
-from pydantic import BaseModel
+from datetime import date
+from itertools import groupby
+from pydantic import BaseModel, Field
+
+from .. import crud, deps, models, pagination, schemas
+from ..distances import distance_cache
 
 router = APIRouter(prefix="/api/itineraries", tags=["itineraries"])
 
-# For now, use in-memory storage (replace with DB later)
-itineraries_db = {}
-itinerary_counter = 1
+# Itineraries and places live in the same tables as /api/v1/itineraries;
+# a place is an ItineraryItem and keeps this router's field names on the wire.
 
 
 class PlaceInItinerary(BaseModel):
@@ -23,157 +26,169 @@ class PlaceInItinerary(BaseModel):
     date: str  # YYYY-MM-DD
     time: Optional[str] = None  # HH:MM
     notes: Optional[str] = None
-    order: int = 0
+    order: int = Field(0, ge=0)  # 1-based position within the day; 0 appends
 
 
-class ItineraryBase(BaseModel):
-    title: str
-    description: Optional[str] = None
-    start_date: str  # YYYY-MM-DD
-    end_date: str  # YYYY-MM-DD
+class ItineraryCreate(schemas.ItineraryCreate):
     destination: str = "Seoul, Korea"
 
 
-class ItineraryCreate(ItineraryBase):
-    pass
-
-
 class ItineraryUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
     destination: Optional[str] = None
 
 
-class ItineraryResponse(ItineraryBase):
-    id: int
-    user_id: str
-    places: List[PlaceInItinerary]
-    created_at: str
-    updated_at: str
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+
+def _place_dict(item: models.ItineraryItem, position: int) -> dict:
+    return {
+        "id": item.external_place_id or str(item.id),
+        "title": item.place_name,
+        "title_kr": item.place_name_kr or "",
+        "category": item.place_type or "",
+        "address": item.address or "",
+        "mapX": item.longitude,
+        "mapY": item.latitude,
+        "date": item.visit_date.isoformat() if item.visit_date else None,
+        "time": item.visit_time,
+        "notes": item.memo,
+        "order": position,
+    }
+
+
+def _place_dicts(items: List[models.ItineraryItem]) -> List[dict]:
+    """Places sorted by day and key, numbered 1.. within each day"""
+    return [
+        _place_dict(item, position)
+        for _, day in groupby(items, key=lambda item: item.visit_date)
+        for position, item in enumerate(day, start=1)
+    ]
+
+
+def _itinerary_dict(it: models.Itinerary, items: List[models.ItineraryItem]) -> dict:
+    return {
+        "id": it.id,
+        "user_id": str(it.user_id),
+        "title": it.title,
+        "description": it.description,
+        "start_date": it.start_date.isoformat(),
+        "end_date": it.end_date.isoformat(),
+        "destination": it.destination,
+        "places": _place_dicts(items),
+        "created_at": it.created_at.isoformat(),
+        "updated_at": it.updated_at.isoformat(),
+    }
+
+
+async def _get_places(
+    db: AsyncSession, itinerary_id: int, user_id: int, visit_date: Optional[date] = None
+) -> List[models.ItineraryItem]:
+    items = await crud.get_owned_items(db, itinerary_id, user_id, visit_date)
+    if items is None:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return items
 
 
 @router.get("/")
 async def list_itineraries(
-    user_id: str = Query(..., description="User ID from auth token"),
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    """Get all itineraries for user"""
-    
-    user_itineraries = [
-        itinerary for itinerary in itineraries_db.values()
-        if itinerary["user_id"] == user_id
-    ]
-    
-    # Pagination
-    paginated = user_itineraries[offset:offset + limit]
-    
+    """Get all itineraries for user, newest start date first"""
+
+    after = pagination.decode_cursor(cursor) if cursor else None
+    rows = await crud.get_itineraries(
+        db, user_id, limit=limit + 1, after=after, with_items=True
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = pagination.encode_cursor(rows[-1].start_date, rows[-1].id)
+
     return {
-        "total": len(user_itineraries),
-        "itineraries": paginated
+        "total": await crud.count_itineraries(db, user_id),
+        "itineraries": [_itinerary_dict(it, it.items) for it in rows],
+        "next_cursor": next_cursor
     }
 
 
 @router.post("/", status_code=201)
 async def create_itinerary(
     data: ItineraryCreate,
-    user_id: str = Query(..., description="User ID from auth token")
+    db: AsyncSession = Depends(deps.get_db),
+    user: schemas.UserRead = Depends(deps.get_current_principal),
 ):
-    """Create new itinerary"""
-    
-    global itinerary_counter
-    
-    now = datetime.now().isoformat()
-    
-    new_itinerary = {
-        "id": itinerary_counter,
-        "user_id": user_id,
-        "title": data.title,
-        "description": data.description,
-        "start_date": data.start_date,
-        "end_date": data.end_date,
-        "destination": data.destination,
-        "places": [],
-        "created_at": now,
-        "updated_at": now
-    }
-    
-    itineraries_db[itinerary_counter] = new_itinerary
-    itinerary_counter += 1
-    
-    return new_itinerary
+    """Create new itinerary (for an existing user: 404 otherwise)"""
+
+    itinerary = await crud.create_itinerary(db, user.id, data)
+    return _itinerary_dict(itinerary, [])
 
 
 @router.get("/{itinerary_id}")
 async def get_itinerary(
     itinerary_id: int,
-    user_id: str = Query(..., description="User ID from auth token")
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
     """Get specific itinerary"""
-    
-    if itinerary_id not in itineraries_db:
+
+    itinerary = await crud.get_itinerary_full(db, itinerary_id, user_id)
+    if not itinerary:
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    
-    itinerary = itineraries_db[itinerary_id]
-    
-    if itinerary["user_id"] != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    return itinerary
+
+    return _itinerary_dict(itinerary, itinerary.items)
 
 
 @router.put("/{itinerary_id}")
 async def update_itinerary(
     itinerary_id: int,
     data: ItineraryUpdate,
-    user_id: str = Query(..., description="User ID from auth token")
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
     """Update itinerary"""
-    
-    if itinerary_id not in itineraries_db:
+
+    itinerary = await crud.get_itinerary_full(db, itinerary_id, user_id)
+    if not itinerary:
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    
-    itinerary = itineraries_db[itinerary_id]
-    
-    if itinerary["user_id"] != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
+
     # Update fields
-    if data.title is not None:
-        itinerary["title"] = data.title
-    if data.description is not None:
-        itinerary["description"] = data.description
-    if data.start_date is not None:
-        itinerary["start_date"] = data.start_date
-    if data.end_date is not None:
-        itinerary["end_date"] = data.end_date
-    if data.destination is not None:
-        itinerary["destination"] = data.destination
-    
-    itinerary["updated_at"] = datetime.now().isoformat()
-    
-    return itinerary
+    for attr, val in data.model_dump(exclude_none=True).items():
+        setattr(itinerary, attr, val)
+    if itinerary.end_date < itinerary.start_date:
+        raise HTTPException(status_code=400, detail="end_date must be after start_date")
+
+    await db.commit()
+    return _itinerary_dict(itinerary, itinerary.items)
 
 
 @router.delete("/{itinerary_id}")
 async def delete_itinerary(
     itinerary_id: int,
-    user_id: str = Query(..., description="User ID from auth token")
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
     """Delete itinerary"""
-    
-    if itinerary_id not in itineraries_db:
+
+    itinerary = await crud.get_itinerary(db, itinerary_id, user_id)
+    if not itinerary:
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    
-    itinerary = itineraries_db[itinerary_id]
-    
-    if itinerary["user_id"] != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    del itineraries_db[itinerary_id]
-    
+
+    await db.delete(itinerary)
+    await db.commit()
+    distance_cache.invalidate(itinerary_id)
+
     return {"message": "Itinerary deleted successfully"}
 
 
@@ -183,82 +198,109 @@ async def delete_itinerary(
 async def add_place_to_itinerary(
     itinerary_id: int,
     place: PlaceInItinerary,
-    user_id: str = Query(..., description="User ID from auth token")
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
     """Add place to itinerary"""
-    
-    if itinerary_id not in itineraries_db:
+
+    if not await crud.touch_itinerary(db, itinerary_id, user_id):
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    
-    itinerary = itineraries_db[itinerary_id]
-    
-    if itinerary["user_id"] != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    # Add place with auto-increment order
-    place_dict = place.dict()
-    if place_dict["order"] == 0:
-        place_dict["order"] = len(itinerary["places"]) + 1
-    
-    itinerary["places"].append(place_dict)
-    itinerary["updated_at"] = datetime.now().isoformat()
-    
-    return {"message": "Place added", "place": place_dict}
+
+    # Appended to its day, then moved to the requested position if any
+    visit_date = _parse_date(place.date)
+    item = models.ItineraryItem(
+        itinerary_id=itinerary_id,
+        external_place_id=place.id,
+        place_name=place.title,
+        place_name_kr=place.title_kr,
+        place_type=place.category,
+        address=place.address,
+        longitude=place.mapX,
+        latitude=place.mapY,
+        visit_date=visit_date,
+        visit_time=place.time,
+        memo=place.notes,
+        visit_order=await crud.next_visit_order(db, itinerary_id, visit_date),
+    )
+    db.add(item)
+    if place.order:
+        await db.flush()
+        await crud.position_item(db, itinerary_id, item, place.order)
+    await db.commit()
+    distance_cache.place_added(itinerary_id, item)
+
+    position = await crud.place_position(db, item)
+    return {"message": "Place added", "place": _place_dict(item, position)}
 
 
 @router.get("/{itinerary_id}/places")
 async def get_itinerary_places(
     itinerary_id: int,
-    user_id: str = Query(..., description="User ID from auth token"),
-    date_filter: Optional[str] = Query(None, description="Filter by date YYYY-MM-DD")
+    date_filter: Optional[str] = Query(None, description="Filter by date YYYY-MM-DD"),
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    """Get all places in itinerary"""
-    
-    if itinerary_id not in itineraries_db:
-        raise HTTPException(status_code=404, detail="Itinerary not found")
-    
-    itinerary = itineraries_db[itinerary_id]
-    
-    if itinerary["user_id"] != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    places = itinerary["places"]
-    
-    # Filter by date if provided
-    if date_filter:
-        places = [p for p in places if p["date"] == date_filter]
-    
-    # Sort by order
-    places.sort(key=lambda x: x["order"])
-    
-    return {"places": places}
+    """Get all places in itinerary, by date and then order"""
+
+    visit_date = _parse_date(date_filter) if date_filter else None
+    items = await _get_places(db, itinerary_id, user_id, visit_date)
+
+    return {"places": _place_dicts(items)}
+
+
+@router.get("/{itinerary_id}/places/legs")
+async def get_itinerary_legs(
+    itinerary_id: int,
+    date_filter: Optional[str] = Query(None, description="Filter by date YYYY-MM-DD"),
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
+):
+    """Straight-line distances between consecutive places of each day"""
+
+    visit_date = _parse_date(date_filter) if date_filter else None
+    items = await _get_places(db, itinerary_id, user_id, visit_date)
+    matrix = distance_cache.get(itinerary_id, items, complete=visit_date is None)
+
+    days = []
+    for day, group in groupby(items, key=lambda item: item.visit_date):
+        group = list(group)
+        distances = matrix.legs([item.id for item in group])
+        days.append({
+            "date": day.isoformat() if day else None,
+            "legs": [
+                {
+                    "from": a.external_place_id or str(a.id),
+                    "to": b.external_place_id or str(b.id),
+                    "distance_km": round(float(km), 3),
+                }
+                for a, b, km in zip(group, group[1:], distances)
+            ],
+            "total_km": round(float(distances.sum()), 3),
+        })
+
+    return {"days": days, "total_km": round(sum(d["total_km"] for d in days), 3)}
 
 
 @router.delete("/{itinerary_id}/places/{place_id}")
 async def remove_place_from_itinerary(
     itinerary_id: int,
     place_id: str,
-    user_id: str = Query(..., description="User ID from auth token")
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
     """Remove place from itinerary"""
-    
-    if itinerary_id not in itineraries_db:
+
+    if not await crud.touch_itinerary(db, itinerary_id, user_id):
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    
-    itinerary = itineraries_db[itinerary_id]
-    
-    if itinerary["user_id"] != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    # Find and remove place
-    original_length = len(itinerary["places"])
-    itinerary["places"] = [p for p in itinerary["places"] if p["id"] != place_id]
-    
-    if len(itinerary["places"]) == original_length:
+
+    removed = await crud.delete_place(db, itinerary_id, user_id, place_id)
+    if not removed:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Place not found in itinerary")
-    
-    itinerary["updated_at"] = datetime.now().isoformat()
-    
+
+    await db.commit()
+    distance_cache.places_removed(itinerary_id, removed)
+
     return {"message": "Place removed successfully"}
 
 
@@ -266,32 +308,20 @@ async def remove_place_from_itinerary(
 async def reorder_place(
     itinerary_id: int,
     place_id: str,
-    new_order: int = Body(..., embed=True),
-    user_id: str = Query(..., description="User ID from auth token")
+    new_order: int = Body(..., embed=True, ge=1, description="1-based position within the place's day"),
+    db: AsyncSession = Depends(deps.get_db),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
-    """Reorder place in itinerary"""
-    
-    if itinerary_id not in itineraries_db:
+    """Move place to a new position within its day"""
+
+    if not await crud.touch_itinerary(db, itinerary_id, user_id):
         raise HTTPException(status_code=404, detail="Itinerary not found")
-    
-    itinerary = itineraries_db[itinerary_id]
-    
-    if itinerary["user_id"] != user_id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    # Find place and update order
-    place_found = False
-    for place in itinerary["places"]:
-        if place["id"] == place_id:
-            place["order"] = new_order
-            place_found = True
-            break
-    
-    if not place_found:
+
+    if not await crud.move_place(db, itinerary_id, user_id, place_id, new_order):
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Place not found")
-    
-    # Re-sort
-    itinerary["places"].sort(key=lambda x: x["order"])
-    itinerary["updated_at"] = datetime.now().isoformat()
-    
-    return {"message": "Place reordered", "places": itinerary["places"]}
+
+    await db.commit()
+    items = await _get_places(db, itinerary_id, user_id)
+
+    return {"message": "Place reordered", "places": _place_dicts(items)}
@@ -1,13 +1,89 @@
 """Kakao Maps and Local API integration"""
+import asyncio
+import math
 import httpx
-from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
+from fastapi import APIRouter, Body, Depends, Query, HTTPException
+from typing import Awaitable, Callable, List, Optional, Tuple
 import os
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import cache, deps, geocode, spatial, upstream
+from ..config import settings
+
 router = APIRouter(prefix="/api/kakao", tags=["kakao"])
 
 KAKAO_REST_API_KEY = os.getenv("KAKAO_REST_API_KEY", "")
 
+# Kakao keyword and category search page at most 45 results (3 pages of 15)
+KAKAO_PAGE_SIZE = 15
+KAKAO_MAX_RESULTS = 45
+
+
+async def fetch_pages(
+    fetch_page: Callable[[int], Awaitable[dict]], limit: int
+) -> Tuple[List[dict], dict]:
+    """Documents from every page needed to cover ``limit`` results.
+    
+    Pages are requested concurrently (at most KAKAO_PAGE_CONCURRENCY at a
+    time) and merged in page order, keeping the first copy of each place id.
+    Returns the documents, which may exceed ``limit``, and the combined meta
+    (is_end: no further pages exist).
+    """
+    pages = range(1, math.ceil(min(limit, KAKAO_MAX_RESULTS) / KAKAO_PAGE_SIZE) + 1)
+    semaphore = asyncio.Semaphore(settings.KAKAO_PAGE_CONCURRENCY)
+    
+    async def fetch(page: int) -> dict:
+        async with semaphore:
+            return await fetch_page(page)
+    
+    responses = await asyncio.gather(*map(fetch, pages))
+    seen = set()
+    documents = []
+    is_end = False
+    for data in responses:
+        for doc in data["documents"]:
+            if doc["id"] not in seen:
+                seen.add(doc["id"])
+                documents.append(doc)
+        if data["meta"]["is_end"]:
+            # Pages past the end repeat the last one
+            is_end = True
+            break
+    return documents, {**responses[0]["meta"], "is_end": is_end}
+
+
+async def fetch_keyword(
+    client: httpx.AsyncClient,
+    query: str,
+    x: Optional[float] = None,
+    y: Optional[float] = None,
+    radius: int = 20000,
+    page: int = 1,
+    size: int = KAKAO_PAGE_SIZE,
+) -> dict:
+    """Raw Kakao keyword search; results feed the spatial index"""
+    params = {
+        "query": query,
+        "page": page,
+        "size": min(size, KAKAO_PAGE_SIZE)
+    }
+    
+    if x and y:
+        params["x"] = x
+        params["y"] = y
+        params["radius"] = min(radius, 20000)
+    
+    data = await upstream.get_json(
+        client,
+        "https://dapi.kakao.com/v2/local/search/keyword.json",
+        flight_key=cache.make_key("kakao:keyword", params),
+        params=params,
+        headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
+    )
+    spatial.index_kakao_documents(data["documents"])
+    return data
+
 
 @router.get("/search/keyword")
 async def search_by_keyword(
@@ -16,137 +92,299 @@ async def search_by_keyword(
     y: Optional[float] = Query(None, description="Latitude for sorting by distance"),
     radius: int = Query(20000, description="Search radius in meters (max 20000)"),
     page: int = Query(1, description="Page number"),
-    size: int = Query(15, description="Results per page (max 15)")
+    size: int = Query(15, description="Results per page (max 15)"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=KAKAO_MAX_RESULTS,
+        description="Fetch up to this many results in one response (max 45); replaces page/size"
+    ),
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
 ):
     """Search places by keyword using Kakao Local API"""
     
     if not KAKAO_REST_API_KEY:
         raise HTTPException(status_code=500, detail="Kakao API key not configured")
     
+    try:
+        if limit:
+            documents, meta = await fetch_pages(
+                lambda p: fetch_keyword(client, query, x, y, radius, p), limit
+            )
+            meta["is_end"] = meta["is_end"] and len(documents) <= limit
+            documents = documents[:limit]
+        else:
+            data = await fetch_keyword(client, query, x, y, radius, page, size)
+            documents, meta = data["documents"], data["meta"]
+        
+        return {
+            "total": meta["total_count"],
+            "is_end": meta["is_end"],
+            "results": [
+                {
+                    "id": place["id"],
+                    "name": place["place_name"],
+                    "category": place["category_name"],
+                    "address": place["address_name"],
+                    "road_address": place.get("road_address_name", ""),
+                    "phone": place.get("phone", ""),
+                    "url": place.get("place_url", ""),
+                    "longitude": float(place["x"]),
+                    "latitude": float(place["y"]),
+                    "distance": place.get("distance", "")
+                }
+                for place in documents
+            ]
+        }
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+
+
+async def fetch_address(
+    client: httpx.AsyncClient, query: str, page: int = 1, size: int = 30
+) -> dict:
+    """Kakao address search, formatted as this router returns it"""
     params = {
         "query": query,
         "page": page,
-        "size": min(size, 15)
+        "size": min(size, 30)
     }
-    
-    if x and y:
-        params["x"] = x
-        params["y"] = y
-        params["radius"] = min(radius, 20000)
-    
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                "https://dapi.kakao.com/v2/local/search/keyword.json",
-                params=params,
-                headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "total": data["meta"]["total_count"],
-                "is_end": data["meta"]["is_end"],
-                "results": [
-                    {
-                        "id": place["id"],
-                        "name": place["place_name"],
-                        "category": place["category_name"],
-                        "address": place["address_name"],
-                        "road_address": place.get("road_address_name", ""),
-                        "phone": place.get("phone", ""),
-                        "url": place.get("place_url", ""),
-                        "longitude": float(place["x"]),
-                        "latitude": float(place["y"]),
-                        "distance": place.get("distance", "")
-                    }
-                    for place in data["documents"]
-                ]
+    data = await upstream.get_json(
+        client,
+        "https://dapi.kakao.com/v2/local/search/address.json",
+        flight_key=cache.make_key("kakao:address", params),
+        params=params,
+        headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
+    )
+    return {
+        "total": data["meta"]["total_count"],
+        "results": [
+            {
+                "address": doc["address_name"],
+                "road_address": (doc.get("road_address") or {}).get("address_name", ""),
+                "longitude": float(doc["x"]) if doc.get("x") else None,
+                "latitude": float(doc["y"]) if doc.get("y") else None
             }
-    except httpx.HTTPError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+            for doc in data["documents"]
+        ]
+    }
 
 
 @router.get("/search/address")
 async def search_by_address(
     query: str = Query(..., description="Address to search"),
     page: int = Query(1, description="Page number"),
-    size: int = Query(10, description="Results per page (max 30)")
+    size: int = Query(10, description="Results per page (max 30)"),
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    """Search address using Kakao Local API"""
+    """Search address using Kakao Local API (first pages cached by normalized address)"""
     
     if not KAKAO_REST_API_KEY:
         raise HTTPException(status_code=500, detail="Kakao API key not configured")
     
-    params = {
-        "query": query,
-        "page": page,
-        "size": min(size, 30)
-    }
+    query = geocode.normalize_address(query)
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                "https://dapi.kakao.com/v2/local/search/address.json",
-                params=params,
-                headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "total": data["meta"]["total_count"],
-                "results": [
-                    {
-                        "address": doc["address_name"],
-                        "road_address": doc.get("road_address", {}).get("address_name", ""),
-                        "longitude": float(doc["x"]) if doc.get("x") else None,
-                        "latitude": float(doc["y"]) if doc.get("y") else None
-                    }
-                    for doc in data["documents"]
-                ]
-            }
+        if page != 1:
+            return await fetch_address(client, query, page, size)
+        
+        # A full first page is cached and sliced, so any size up to 30 hits
+        found = await geocode.get(db, geocode.ADDRESS, query)
+        if found is None:
+            found = await fetch_address(client, query)
+            if found["results"]:
+                await geocode.put(db, geocode.ADDRESS, query, found)
+        return {"total": found["total"], "results": found["results"][:min(size, 30)]}
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to search address: {str(e)}")
 
 
+@router.post("/search/address/bulk")
+async def search_addresses_bulk(
+    queries: List[str] = Body(..., embed=True, min_length=1, description="Addresses to resolve"),
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
+    db: AsyncSession = Depends(deps.get_db)
+):
+    """Best match for each address, in request order.
+    
+    Cached addresses are answered from the geocode cache; only misses go to
+    Kakao, at most GEOCODE_BULK_CONCURRENCY at a time.
+    """
+    
+    if not KAKAO_REST_API_KEY:
+        raise HTTPException(status_code=500, detail="Kakao API key not configured")
+    if len(queries) > settings.GEOCODE_BULK_MAX_QUERIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.GEOCODE_BULK_MAX_QUERIES} addresses per bulk request"
+        )
+    
+    keys = [geocode.normalize_address(q) for q in queries]
+    found = await geocode.get_many(db, geocode.ADDRESS, keys)
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    
+    semaphore = asyncio.Semaphore(settings.GEOCODE_BULK_CONCURRENCY)
+    errors = {}
+    
+    async def resolve(key: str):
+        async with semaphore:
+            try:
+                return await fetch_address(client, key)
+            except httpx.HTTPError as e:
+                errors[key] = str(e)
+    
+    fetched = dict(zip(missing, await asyncio.gather(*map(resolve, missing))))
+    fetched = {key: value for key, value in fetched.items() if value and value["results"]}
+    await geocode.put_many(db, geocode.ADDRESS, fetched)
+    found.update(fetched)
+    
+    results = []
+    for query, key in zip(queries, keys):
+        match = found[key]["results"][0] if key in found else None
+        result = {"query": query, "found": match is not None, **(match or {})}
+        if key in errors:
+            result["error"] = errors[key]
+        results.append(result)
+    
+    return {
+        "results": results,
+        "cached": len(set(keys)) - len(missing),
+        "fetched": len(missing),
+    }
+
+
 @router.get("/coord-to-address")
 async def coord_to_address(
     x: float = Query(..., description="Longitude"),
-    y: float = Query(..., description="Latitude")
+    y: float = Query(..., description="Latitude"),
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
+    db: AsyncSession = Depends(deps.get_db)
 ):
-    """Convert coordinates to address"""
+    """Convert coordinates to address (cached by rounded coordinates)"""
     
     if not KAKAO_REST_API_KEY:
         raise HTTPException(status_code=500, detail="Kakao API key not configured")
     
-    params = {"x": x, "y": y}
+    key = geocode.coord_key(x, y)
+    found = await geocode.get(db, geocode.REVERSE, key)
+    if found is not None:
+        return {**found, "longitude": x, "latitude": y}
+    
+    # Resolve the rounded point so the cached answer matches its key
+    params = {"x": geocode.round_coord(x), "y": geocode.round_coord(y)}
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                "https://dapi.kakao.com/v2/local/geo/coord2address.json",
-                params=params,
-                headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data["documents"]:
-                raise HTTPException(status_code=404, detail="Address not found for coordinates")
-            
-            doc = data["documents"][0]
-            
-            return {
-                "address": doc["address"]["address_name"] if "address" in doc else "",
-                "road_address": doc["road_address"]["address_name"] if "road_address" in doc else "",
-                "longitude": x,
-                "latitude": y
-            }
+        data = await upstream.get_json(
+            client,
+            "https://dapi.kakao.com/v2/local/geo/coord2address.json",
+            flight_key=cache.make_key("kakao:coord2address", params),
+            params=params,
+            headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
+        )
+        
+        if not data["documents"]:
+            raise HTTPException(status_code=404, detail="Address not found for coordinates")
+        
+        doc = data["documents"][0]
+        found = {
+            "address": (doc.get("address") or {}).get("address_name", ""),
+            "road_address": (doc.get("road_address") or {}).get("address_name", ""),
+        }
+        await geocode.put(db, geocode.REVERSE, key, found)
+        
+        return {**found, "longitude": x, "latitude": y}
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to convert coordinates: {str(e)}")
 
 
+async def fetch_category(
+    client: httpx.AsyncClient,
+    category_code: str,
+    x: float,
+    y: float,
+    radius: int,
+    page: int = 1,
+    size: int = KAKAO_PAGE_SIZE,
+    exact: bool = False,
+) -> dict:
+    """Raw Kakao category search; results feed the spatial index.
+
+    With GEOCELL_CACHE_ENABLED (and not exact) the centre is snapped to a
+    geocell and the radius rounded up to a bucket, so nearby callers share
+    one cached response; callers re-rank it from their exact point
+    (by_distance). The first page marks what it proves known warm
+    (mark_fetched), whether it came from upstream or the cache.
+    """
+    shared = settings.GEOCELL_CACHE_ENABLED and not exact
+    x, y, radius = category_circle(x, y, radius, exact)
+    params = {
+        "category_group_code": category_code,
+        "x": x,
+        "y": y,
+        "radius": radius,
+        "page": page,
+        "size": min(size, KAKAO_PAGE_SIZE),
+        "sort": "distance"
+    }
+    cache_key = cache.make_key("kakao:category", params)
+    data = await cache.geo_cache.get(cache_key) if shared else None
+    if data is None:
+        data = await upstream.get_json(
+            client,
+            "https://dapi.kakao.com/v2/local/search/category.json",
+            flight_key=cache_key,
+            params=params,
+            headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
+        )
+        if shared:
+            await cache.geo_cache.set(cache_key, data)
+    spatial.index_kakao_documents(data["documents"])
+    if page == 1:
+        mark_fetched(category_code, x, y, radius, data["documents"], data["meta"]["is_end"])
+    return data
+
+
+def category_circle(x: float, y: float, radius: int, exact: bool = False) -> Tuple[float, float, int]:
+    """The (x, y, radius) fetch_category actually queries Kakao with"""
+    radius = min(radius, 20000)
+    if settings.GEOCELL_CACHE_ENABLED and not exact:
+        y, x, radius = spatial.quantize(y, x, radius)
+        radius = min(radius, 20000)
+    return x, y, radius
+
+
+def mark_fetched(
+    category_code: str, x: float, y: float, radius: int, documents: List[dict], is_end: bool
+):
+    """Mark warm the part of a fetched category circle whose places are all known.
+    
+    That is the whole circle when the result was complete; otherwise, since
+    Kakao returns places nearest first, everything closer than the farthest
+    place fetched.
+    """
+    if not is_end:
+        if not documents:
+            return
+        meters = spatial.distances_from(
+            y, x, [float(d["y"]) for d in documents], [float(d["x"]) for d in documents]
+        )
+        radius = min(radius, float(meters.max()) - 1)
+    if radius > 0:
+        spatial.place_index.mark_warm(category_code, y, x, radius)
+
+
+def by_distance(documents: List[dict], x: float, y: float, radius: float) -> List[dict]:
+    """Documents within radius of (x, y), nearest first, with exact distances"""
+    meters = spatial.distances_from(
+        y, x, [float(d["y"]) for d in documents], [float(d["x"]) for d in documents]
+    )
+    ranked = sorted(zip(meters, range(len(documents))))
+    return [
+        {**documents[i], "distance": str(int(round(m)))}
+        for m, i in ranked
+        if m <= radius
+    ]
+
+
 @router.get("/category")
 async def search_by_category(
     category_code: str = Query(..., description="Category code (MT1:마트, FD6:음식점, CE7:카페, HP8:병원, PM9:약국)"),
@@ -154,50 +392,69 @@ async def search_by_category(
     y: float = Query(..., description="Center latitude"),
     radius: int = Query(5000, description="Search radius in meters (max 20000)"),
     page: int = Query(1, description="Page number"),
-    size: int = Query(15, description="Results per page (max 15)")
+    size: int = Query(15, description="Results per page (max 15)"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=KAKAO_MAX_RESULTS,
+        description="Fetch up to this many results in one response (max 45); replaces page/size"
+    ),
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
 ):
     """Search places by category"""
     
     if not KAKAO_REST_API_KEY:
         raise HTTPException(status_code=500, detail="Kakao API key not configured")
     
-    params = {
-        "category_group_code": category_code,
-        "x": x,
-        "y": y,
-        "radius": min(radius, 20000),
-        "page": page,
-        "size": min(size, 15),
-        "sort": "distance"
-    }
-    
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                "https://dapi.kakao.com/v2/local/search/category.json",
-                params=params,
-                headers={"Authorization": f"KakaoAK {KAKAO_REST_API_KEY}"}
+    radius = min(radius, 20000)
+    wanted = limit or min(size, KAKAO_PAGE_SIZE)
+
+    async def fetch(exact: bool):
+        if limit:
+            return await fetch_pages(
+                lambda p: fetch_category(client, category_code, x, y, radius, p, exact=exact),
+                limit
             )
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "total": data["meta"]["total_count"],
-                "results": [
-                    {
-                        "id": place["id"],
-                        "name": place["place_name"],
-                        "category": place["category_name"],
-                        "address": place["address_name"],
-                        "road_address": place.get("road_address_name", ""),
-                        "phone": place.get("phone", ""),
-                        "url": place.get("place_url", ""),
-                        "longitude": float(place["x"]),
-                        "latitude": float(place["y"]),
-                        "distance": int(place.get("distance", 0))
-                    }
-                    for place in data["documents"]
-                ]
-            }
+        # Shared pages are always full so callers of any size share them
+        data = await fetch_category(
+            client, category_code, x, y, radius, page,
+            size if exact else KAKAO_PAGE_SIZE, exact=exact
+        )
+        return data["documents"], data["meta"]
+
+    try:
+        documents = None
+        if settings.GEOCELL_CACHE_ENABLED and page == 1:
+            # The shared circle covers the caller's one, but its pages are
+            # nearest its snapped centre: only a complete result can be
+            # re-ranked into the caller's nearest places and counted.
+            shared, meta = await fetch(exact=False)
+            if meta["is_end"]:
+                ranked = by_distance(shared, x, y, radius)
+                documents = ranked[:wanted]
+                total, is_end = len(ranked), len(ranked) <= wanted
+        if documents is None:
+            documents, meta = await fetch(exact=True)
+            ranked = by_distance(documents, x, y, radius)
+            documents = ranked[:wanted]
+            total, is_end = meta["total_count"], meta["is_end"] and len(ranked) <= wanted
+
+        return {
+            "total": total,
+            "is_end": is_end,
+            "results": [
+                {
+                    "id": place["id"],
+                    "name": place["place_name"],
+                    "category": place["category_name"],
+                    "address": place["address_name"],
+                    "road_address": place.get("road_address_name", ""),
+                    "phone": place.get("phone", ""),
+                    "url": place.get("place_url", ""),
+                    "longitude": float(place["x"]),
+                    "latitude": float(place["y"]),
+                    "distance": int(place.get("distance", 0))
+                }
+                for place in documents
+            ]
+        }
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to search by category: {str(e)}")
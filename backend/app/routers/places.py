@@ -1,9 +1,13 @@
 """Places and tourist spots API with TourAPI integration"""
 import httpx
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
 from typing import Optional, List
 import os
 
+from .. import cache, deps, spatial, upstream
+from ..config import settings
+from .kakao import KAKAO_REST_API_KEY, category_circle, fetch_category, fetch_pages, mark_fetched
+
 router = APIRouter(prefix="/api/places", tags=["places"])
 
 TOUR_API_KEY = os.getenv("TOUR_API_KEY", "")
@@ -15,7 +19,8 @@ async def get_popular_places(
     language: str = Query("ENG", description="KOR, ENG, JPN, CHS, CHT"),
     areaCode: Optional[str] = Query(None, description="Area code (1:Seoul, 6:Busan, etc)"),
     contentTypeId: str = Query("12", description="12(Tourist), 14(Culture), 15(Festival), 32(Hotel), 39(Food)"),
-    numOfRows: int = Query(20, ge=1, le=100)
+    numOfRows: int = Query(20, ge=1, le=100),
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
 ):
     """Get popular tourist spots"""
     
@@ -119,40 +124,48 @@ async def get_popular_places(
     if areaCode:
         params["areaCode"] = areaCode
     
+    cache_key = cache.make_key("places:popular", params)
+    cached = await cache.tour_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/areaBasedList1",
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-            
-            if isinstance(items, dict):
-                items = [items]
-            
-            results = []
-            for item in items:
-                results.append({
-                    "id": item.get("contentid"),
-                    "title": item.get("title", ""),
-                    "title_kr": item.get("title", ""),
-                    "category": get_category_name(item.get("cat3", "")),
-                    "address": item.get("addr1", ""),
-                    "address_kr": item.get("addr1", ""),
-                    "mapX": float(item.get("mapx", 0)),
-                    "mapY": float(item.get("mapy", 0)),
-                    "image": item.get("firstimage", "") or item.get("firstimage2", ""),
-                    "rating": 4.5,  # Default rating
-                    "tel": item.get("tel", "")
-                })
-            
-            return {
-                "total": len(results),
-                "results": results
-            }
+        data = await upstream.get_json(
+            client,
+            f"{BASE_URL}/areaBasedList1",
+            flight_key=cache_key,
+            params=params,
+            timeout=settings.TOUR_API_TIMEOUT
+        )
+        
+        items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+        
+        if isinstance(items, dict):
+            items = [items]
+        spatial.index_tour_items(items)
+        
+        results = []
+        for item in items:
+            results.append({
+                "id": item.get("contentid"),
+                "title": item.get("title", ""),
+                "title_kr": item.get("title", ""),
+                "category": get_category_name(item.get("cat3", "")),
+                "address": item.get("addr1", ""),
+                "address_kr": item.get("addr1", ""),
+                "mapX": float(item.get("mapx", 0)),
+                "mapY": float(item.get("mapy", 0)),
+                "image": item.get("firstimage", "") or item.get("firstimage2", ""),
+                "rating": 4.5,  # Default rating
+                "tel": item.get("tel", "")
+            })
+        
+        result = {
+            "total": len(results),
+            "results": results
+        }
+        await cache.tour_cache.set(cache_key, result, settings.TOUR_LIST_CACHE_TTL)
+        return result
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch places: {str(e)}")
 
@@ -163,7 +176,8 @@ async def search_places(
     language: str = Query("ENG", description="KOR, ENG, JPN, CHS, CHT"),
     areaCode: Optional[str] = Query(None, description="Area code filter"),
     contentTypeId: Optional[str] = Query(None, description="Content type filter"),
-    numOfRows: int = Query(20, ge=1, le=100)
+    numOfRows: int = Query(20, ge=1, le=100),
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
 ):
     """Search places by keyword"""
     
@@ -190,43 +204,92 @@ async def search_places(
     if contentTypeId:
         params["contentTypeId"] = contentTypeId
     
+    cache_key = cache.make_key("places:search", params)
+    cached = await cache.tour_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/searchKeyword1",
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-            
-            if isinstance(items, dict):
-                items = [items]
-            
-            results = []
-            for item in items:
-                results.append({
-                    "id": item.get("contentid"),
-                    "title": item.get("title", ""),
-                    "title_kr": item.get("title", ""),
-                    "category": get_category_name(item.get("cat3", "")),
-                    "address": item.get("addr1", ""),
-                    "address_kr": item.get("addr1", ""),
-                    "mapX": float(item.get("mapx", 0)),
-                    "mapY": float(item.get("mapy", 0)),
-                    "image": item.get("firstimage", "") or item.get("firstimage2", ""),
-                    "tel": item.get("tel", "")
-                })
-            
-            return {
-                "total": len(results),
-                "results": results
-            }
+        data = await upstream.get_json(
+            client,
+            f"{BASE_URL}/searchKeyword1",
+            flight_key=cache_key,
+            params=params,
+            timeout=settings.TOUR_API_TIMEOUT
+        )
+        
+        items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+        
+        if isinstance(items, dict):
+            items = [items]
+        spatial.index_tour_items(items)
+        
+        results = []
+        for item in items:
+            results.append({
+                "id": item.get("contentid"),
+                "title": item.get("title", ""),
+                "title_kr": item.get("title", ""),
+                "category": get_category_name(item.get("cat3", "")),
+                "address": item.get("addr1", ""),
+                "address_kr": item.get("addr1", ""),
+                "mapX": float(item.get("mapx", 0)),
+                "mapY": float(item.get("mapy", 0)),
+                "image": item.get("firstimage", "") or item.get("firstimage2", ""),
+                "tel": item.get("tel", "")
+            })
+        
+        result = {
+            "total": len(results),
+            "results": results
+        }
+        await cache.tour_cache.set(cache_key, result, settings.TOUR_SEARCH_CACHE_TTL)
+        return result
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to search places: {str(e)}")
 
 
+@router.get("/nearby")
+async def get_nearby_places(
+    mapX: float = Query(..., description="Longitude"),
+    mapY: float = Query(..., description="Latitude"),
+    radius: int = Query(1000, ge=1, le=20000, description="Radius in meters"),
+    category_code: Optional[str] = Query(None, description="Kakao category group code (FD6, CE7, AT4, ...)"),
+    limit: int = Query(15, ge=1, le=100),
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
+):
+    """Known places near a point, nearest first, from the in-process spatial index.
+    
+    With a category, areas whose nearest ``limit`` places are not all known
+    yet are fetched first (as many Kakao pages as ``limit`` needs); without
+    one, only places already seen are returned.
+    """
+    
+    source = "index"
+    if (
+        category_code
+        and KAKAO_REST_API_KEY
+        and not spatial.place_index.is_warm(category_code, mapY, mapX, radius, limit)
+    ):
+        try:
+            documents, meta = await fetch_pages(
+                lambda p: fetch_category(client, category_code, mapX, mapY, radius, p), limit
+            )
+            mark_fetched(
+                category_code, *category_circle(mapX, mapY, radius), documents, meta["is_end"]
+            )
+            source = "upstream"
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch nearby places: {str(e)}")
+    
+    hits = spatial.place_index.nearby(mapY, mapX, radius, limit, category_code)
+    return {
+        "source": source,
+        "total": len(hits),
+        "results": [spatial.place_dict(place, meters) for place, meters in hits]
+    }
+
+
 def get_category_name(cat3: str) -> str:
     """Convert category code to readable name"""
     categories = {
@@ -1,13 +1,23 @@
 # backend/app/routers/search.py
-from fastapi import APIRouter, Query, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import Any, Awaitable, Dict, List, Set, Tuple
+import asyncio
+import logging
+import re
+import unicodedata
 import httpx
 
-from .. import schemas
+from .. import schemas, deps, spatial
 from ..config import settings
+from . import kakao, tour
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+# Source calls that missed their deadline keep running so their caches fill
+_background: Set[asyncio.Task] = set()
+
 
 @router.get("/places", response_model=List[schemas.PlaceResult])
 async def search_places(
@@ -16,6 +26,7 @@ async def search_places(
     longitude: float = Query(..., ge=-180, le=180),
     language: str = Query("en"),
     limit: int = Query(15, ge=1, le=30),
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
 ):
     """
     Search places using Kakao Local Keyword API
@@ -32,11 +43,11 @@ async def search_places(
         "sort": "distance",
     }
     
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=headers, params=params, timeout=10)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail="Kakao API error")
-        data = resp.json()
+    resp = await client.get(url, headers=headers, params=params)
+    if resp.status_code != 200:
+        raise HTTPException(status_code=502, detail="Kakao API error")
+    data = resp.json()
+    spatial.index_kakao_documents(data.get("documents", []))
     
     results = []
     for doc in data.get("documents", []):
@@ -52,3 +63,166 @@ async def search_places(
             )
         )
     return results
+
+
+def _name_key(name: str) -> str:
+    # Width-folded, lower-cased, without spaces, punctuation or a (qualifier)
+    name = unicodedata.normalize("NFKC", name).lower()
+    name = re.sub(r"\(.*?\)", "", name)
+    return re.sub(r"[\W_]+", "", name)
+
+
+def _same_name(a: str, b: str) -> bool:
+    a, b = _name_key(a), _name_key(b)
+    return bool(a and b) and (a == b or a in b or b in a)
+
+
+def _background_done(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.info("Late federated search source failed: %s", task.exception())
+
+
+async def _with_deadline(
+    name: str, call: Awaitable[List[schemas.PlaceResult]], timeout: float
+) -> Tuple[str, List[schemas.PlaceResult]]:
+    task = asyncio.ensure_future(call)
+    try:
+        return "ok", await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        _background.add(task)
+        task.add_done_callback(_background_done)
+        return "timeout", []
+    except Exception as e:
+        # Any single-source failure degrades to a partial result
+        logger.warning("Federated search source %s failed: %s", name, e)
+        return "error", []
+
+
+async def _kakao_places(
+    client: httpx.AsyncClient, q: str, latitude: float, longitude: float, radius: int, limit: int
+) -> List[schemas.PlaceResult]:
+    documents, _ = await kakao.fetch_pages(
+        lambda p: kakao.fetch_keyword(client, q, longitude, latitude, radius, p), limit
+    )
+    return [
+        schemas.PlaceResult(
+            id=doc["id"],
+            name=doc["place_name"],
+            latitude=float(doc["y"]),
+            longitude=float(doc["x"]),
+            address=doc.get("road_address_name") or doc["address_name"],
+            phone=doc.get("phone") or None,
+            kakao_place_id=doc["id"],
+        )
+        for doc in documents[:limit]
+    ]
+
+
+async def _tour_places(
+    client: httpx.AsyncClient, q: str, latitude: float, longitude: float, radius: int, limit: int
+) -> List[schemas.PlaceResult]:
+    # locationBasedList1 ignores keywords, so search by keyword nationwide
+    # and keep the matches inside the circle, nearest first
+    data = await tour.keyword_spots(client, q, settings.FEDERATED_TOUR_ROWS)
+    nearby = tour.nearest(
+        [item for item in data["results"] if item["id"] and item["mapX"] and item["mapY"]],
+        longitude, latitude, radius,
+    )
+    return [
+        schemas.PlaceResult(
+            id=f"tour:{item['id']}",
+            name=item["title"],
+            latitude=item["mapY"],
+            longitude=item["mapX"],
+            address=item["address"],
+            phone=item["tel"] or None,
+            tour_content_id=str(item["id"]),
+            source="tour",
+        )
+        for _, item in nearby[:limit]
+    ]
+
+
+def _merge(
+    kakao_places: List[schemas.PlaceResult], tour_places: List[schemas.PlaceResult]
+) -> List[schemas.PlaceResult]:
+    """Kakao places, annotated with the TourAPI place they match, then
+    unmatched TourAPI places"""
+    merged = list(kakao_places)
+    for place in tour_places:
+        meters = spatial.distances_from(
+            place.latitude, place.longitude,
+            [k.latitude for k in kakao_places], [k.longitude for k in kakao_places],
+        )
+        match = next(
+            (
+                k for k, m in sorted(zip(kakao_places, meters), key=lambda pair: pair[1])
+                if m <= settings.FEDERATED_MATCH_METERS
+                and k.tour_content_id is None
+                and _same_name(k.name, place.name)
+            ),
+            None,
+        )
+        if match is not None:
+            match.tour_content_id = place.tour_content_id
+        else:
+            merged.append(place)
+    return merged
+
+
+@router.get("/federated", response_model=schemas.FederatedSearchResponse)
+async def federated_search(
+    q: str = Query(..., description="Search term"),
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius: int = Query(20000, ge=1, le=20000, description="Search radius in meters"),
+    limit: int = Query(15, ge=1, le=kakao.KAKAO_MAX_RESULTS, description="Results per source"),
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
+):
+    """
+    Search Kakao Local and TourAPI at once, nearest first.
+    
+    Both sources are queried concurrently, each with its own deadline; a
+    source that is slow or failing is reported in ``sources`` and the other
+    source's results are still returned (``partial``). A place found by both
+    (matching names within FEDERATED_MATCH_METERS) is returned once, as the
+    Kakao place carrying the TourAPI content id.
+    """
+    calls: Dict[str, Any] = {}
+    if kakao.KAKAO_REST_API_KEY:
+        calls["kakao"] = _with_deadline(
+            "kakao",
+            _kakao_places(client, q, latitude, longitude, radius, limit),
+            settings.FEDERATED_KAKAO_TIMEOUT,
+        )
+    if tour.TOUR_API_KEY:
+        calls["tour"] = _with_deadline(
+            "tour",
+            _tour_places(client, q, latitude, longitude, radius, limit),
+            settings.FEDERATED_TOUR_TIMEOUT,
+        )
+    if not calls:
+        raise HTTPException(status_code=500, detail="No place search API key configured")
+    
+    outcomes = dict(zip(calls, await asyncio.gather(*calls.values())))
+    sources = {name: "disabled" for name in ("kakao", "tour")}
+    sources.update({name: status for name, (status, _) in outcomes.items()})
+    if all(status != "ok" for status, _ in outcomes.values()):
+        raise HTTPException(status_code=502, detail=f"Place search failed: {sources}")
+    
+    results = _merge(
+        outcomes.get("kakao", ("", []))[1], outcomes.get("tour", ("", []))[1]
+    )
+    meters = spatial.distances_from(
+        latitude, longitude, [p.latitude for p in results], [p.longitude for p in results]
+    )
+    for place, m in zip(results, meters):
+        place.distance = int(round(m))
+    results.sort(key=lambda place: place.distance)
+    
+    return schemas.FederatedSearchResponse(
+        results=results,
+        sources=sources,
+        partial=any(status != "ok" for status, _ in outcomes.values()),
+    )
@@ -1,29 +1,69 @@
 """Tour API integration for Korea tourism data"""
 import httpx
-from fastapi import APIRouter, Query, HTTPException
-from typing import Optional, List
+from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import List, Optional, Tuple
 import os
 
+from .. import cache, deps, spatial, upstream
+from ..config import settings
+
 router = APIRouter(prefix="/api/tour", tags=["tour"])
 
 TOUR_API_KEY = os.getenv("TOUR_API_KEY", "")
 BASE_URL = "http://apis.data.go.kr/B551011/KorService1"
 
 
-@router.get("/search")
-async def search_tourist_spots(
-    keyword: str = Query(..., description="Search keyword"),
-    mapX: float = Query(..., description="Longitude"),
-    mapY: float = Query(..., description="Latitude"),
-    radius: int = Query(10000, description="Search radius in meters"),
-    numOfRows: int = Query(10, description="Number of results"),
-    contentTypeId: Optional[str] = Query(None, description="Content type: 12(관광지), 14(문화시설), 15(축제), 32(숙박), 39(음식점)")
-):
-    """Search tourist spots using TourAPI 4.0"""
-    
-    if not TOUR_API_KEY:
-        raise HTTPException(status_code=500, detail="Tour API key not configured")
+def nearest(
+    places: List[dict], mapX: float, mapY: float, reach: float
+) -> List[Tuple[float, dict]]:
+    """(metres, place) within reach of the caller, nearest first"""
+    meters = spatial.distances_from(
+        mapY, mapX, [p["mapY"] for p in places], [p["mapX"] for p in places]
+    )
+    ranked = sorted(zip(meters, range(len(places))))
+    return [(m, places[i]) for m, i in ranked if m <= reach]
+
+
+def _response(ranked: List[Tuple[float, dict]], numOfRows: int) -> dict:
+    # New dicts: cached results are shared between callers
+    results = [{**place, "distance": int(round(m))} for m, place in ranked[:numOfRows]]
+    return {"total": len(results), "results": results}
+
+
+def _within(
+    shared: dict, center: Tuple[float, float], mapX: float, mapY: float,
+    radius: float, numOfRows: int
+) -> Optional[dict]:
+    """The caller's nearest numOfRows spots from a shared geocell result, or
+    None when the shared result cannot vouch for them.
     
+    The shared query lists spots by distance from the snapped centre. If it
+    was cut off at GEOCELL_TOUR_ROWS, only spots closer to the caller than
+    the farthest one fetched (less the snap offset) are known completely.
+    """
+    places = shared["results"]
+    reach = radius
+    if len(places) >= settings.GEOCELL_TOUR_ROWS:
+        from_center = spatial.distances_from(
+            center[0], center[1], [p["mapY"] for p in places], [p["mapX"] for p in places]
+        )
+        reach = min(radius, from_center.max() - spatial.snap_offset())
+    ranked = nearest(places, mapX, mapY, reach)
+    if len(ranked) < numOfRows and reach < radius:
+        return None
+    return _response(ranked, numOfRows)
+
+
+async def _fetch_spots(
+    client: httpx.AsyncClient,
+    keyword: str,
+    mapX: float,
+    mapY: float,
+    radius: int,
+    numOfRows: int,
+    contentTypeId: Optional[str],
+    arrange: str,
+) -> dict:
     params = {
         "serviceKey": TOUR_API_KEY,
         "_type": "json",
@@ -34,50 +74,147 @@ async def search_tourist_spots(
         "radius": radius,
         "numOfRows": numOfRows,
         "keyword": keyword,
-        "arrange": "P"  # Popular order
+        "arrange": arrange
     }
     
     if contentTypeId:
         params["contentTypeId"] = contentTypeId
     
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/locationBasedList1",
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-            
-            # Normalize single item to list
-            if isinstance(items, dict):
-                items = [items]
-            
-            return {
-                "total": len(items),
-                "results": [
-                    {
-                        "id": item.get("contentid"),
-                        "title": item.get("title", ""),
-                        "address": item.get("addr1", ""),
-                        "category": item.get("cat3", ""),
-                        "image": item.get("firstimage", ""),
-                        "thumbnail": item.get("firstimage2", ""),
-                        "mapX": float(item.get("mapx", 0)),
-                        "mapY": float(item.get("mapy", 0)),
-                        "tel": item.get("tel", "")
-                    }
-                    for item in items
-                ]
+    cache_key = cache.make_key("tour:search", params)
+    cached = await cache.tour_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    return await _get_spots(client, "locationBasedList1", params, cache_key)
+
+
+async def keyword_spots(
+    client: httpx.AsyncClient,
+    keyword: str,
+    numOfRows: int = 100,
+    contentTypeId: Optional[str] = None,
+) -> dict:
+    """TourAPI keyword search (nationwide), cached; raises httpx.HTTPError"""
+    params = {
+        "serviceKey": TOUR_API_KEY,
+        "_type": "json",
+        "MobileOS": "ETC",
+        "MobileApp": "TravelKorea",
+        "keyword": keyword,
+        "numOfRows": numOfRows,
+    }
+    
+    if contentTypeId:
+        params["contentTypeId"] = contentTypeId
+    
+    cache_key = cache.make_key("tour:keyword", params)
+    cached = await cache.tour_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    return await _get_spots(client, "searchKeyword1", params, cache_key)
+
+
+async def _get_spots(
+    client: httpx.AsyncClient, operation: str, params: dict, cache_key: str
+) -> dict:
+    data = await upstream.get_json(
+        client,
+        f"{BASE_URL}/{operation}",
+        flight_key=cache_key,
+        params=params,
+        timeout=settings.TOUR_API_TIMEOUT
+    )
+    
+    # TourAPI sends "items": "" when nothing matches
+    items = data.get("response", {}).get("body", {}).get("items") or {}
+    items = items.get("item", [])
+    
+    # Normalize single item to list
+    if isinstance(items, dict):
+        items = [items]
+    spatial.index_tour_items(items)
+    
+    result = {
+        "total": len(items),
+        "results": [
+            {
+                "id": item.get("contentid"),
+                "title": item.get("title", ""),
+                "address": item.get("addr1", ""),
+                "category": item.get("cat3", ""),
+                "image": item.get("firstimage", ""),
+                "thumbnail": item.get("firstimage2", ""),
+                "mapX": float(item.get("mapx", 0)),
+                "mapY": float(item.get("mapy", 0)),
+                "tel": item.get("tel", "")
             }
+            for item in items
+        ]
+    }
+    await cache.tour_cache.set(cache_key, result, settings.TOUR_SEARCH_CACHE_TTL)
+    return result
+
+
+async def search_spots(
+    client: httpx.AsyncClient,
+    keyword: str,
+    mapX: float,
+    mapY: float,
+    radius: int = 10000,
+    numOfRows: int = 10,
+    contentTypeId: Optional[str] = None,
+) -> dict:
+    """TourAPI location-based search, cached; raises httpx.HTTPError
+    
+    With GEOCELL_CACHE_ENABLED, results are nearest first: nearby callers
+    share one distance-ordered query of GEOCELL_TOUR_ROWS spots around a
+    snapped centre and wider radius, re-ranked from each caller's point.
+    Without it, results keep TourAPI's popularity order.
+    """
+    if not settings.GEOCELL_CACHE_ENABLED:
+        return await _fetch_spots(client, keyword, mapX, mapY, radius, numOfRows, contentTypeId, "P")
+    
+    if numOfRows <= settings.GEOCELL_TOUR_ROWS:
+        lat, lon, wide = spatial.quantize(mapY, mapX, radius)
+        shared = await _fetch_spots(
+            client, keyword, lon, lat, wide, settings.GEOCELL_TOUR_ROWS, contentTypeId, "E"
+        )
+        result = _within(shared, (lat, lon), mapX, mapY, radius, numOfRows)
+        if result is not None:
+            return result
+    
+    # Exact query around the caller's own point
+    exact = await _fetch_spots(client, keyword, mapX, mapY, radius, numOfRows, contentTypeId, "E")
+    return _response(nearest(exact["results"], mapX, mapY, radius), numOfRows)
+
+
+@router.get("/search")
+async def search_tourist_spots(
+    keyword: str = Query(..., description="Search keyword"),
+    mapX: float = Query(..., description="Longitude"),
+    mapY: float = Query(..., description="Latitude"),
+    radius: int = Query(10000, description="Search radius in meters"),
+    numOfRows: int = Query(10, description="Number of results"),
+    contentTypeId: Optional[str] = Query(None, description="Content type: 12(관광지), 14(문화시설), 15(축제), 32(숙박), 39(음식점)"),
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
+):
+    """Search tourist spots using TourAPI 4.0"""
+    
+    if not TOUR_API_KEY:
+        raise HTTPException(status_code=500, detail="Tour API key not configured")
+    
+    try:
+        return await search_spots(client, keyword, mapX, mapY, radius, numOfRows, contentTypeId)
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch tour data: {str(e)}")
 
 
 @router.get("/detail/{content_id}")
-async def get_tour_detail(content_id: str):
+async def get_tour_detail(
+    content_id: str,
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
+):
     """Get detailed information about a tourist spot"""
     
     if not TOUR_API_KEY:
@@ -96,39 +233,46 @@ async def get_tour_detail(content_id: str):
         "overviewYN": "Y"
     }
     
+    cache_key = cache.make_key("tour:detail", params)
+    cached = await cache.tour_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/detailCommon1",
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-            
-            if isinstance(items, list) and len(items) > 0:
-                item = items[0]
-            elif isinstance(items, dict):
-                item = items
-            else:
-                raise HTTPException(status_code=404, detail="Tourist spot not found")
-            
-            return {
-                "id": item.get("contentid"),
-                "title": item.get("title", ""),
-                "address": item.get("addr1", ""),
-                "detailAddress": item.get("addr2", ""),
-                "category": item.get("cat3", ""),
-                "image": item.get("firstimage", ""),
-                "thumbnail": item.get("firstimage2", ""),
-                "mapX": float(item.get("mapx", 0)),
-                "mapY": float(item.get("mapy", 0)),
-                "tel": item.get("tel", ""),
-                "homepage": item.get("homepage", ""),
-                "overview": item.get("overview", ""),
-                "zipcode": item.get("zipcode", "")
-            }
+        data = await upstream.get_json(
+            client,
+            f"{BASE_URL}/detailCommon1",
+            flight_key=cache_key,
+            params=params,
+            timeout=settings.TOUR_API_TIMEOUT
+        )
+        
+        items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+        
+        if isinstance(items, list) and len(items) > 0:
+            item = items[0]
+        elif isinstance(items, dict):
+            item = items
+        else:
+            raise HTTPException(status_code=404, detail="Tourist spot not found")
+        
+        result = {
+            "id": item.get("contentid"),
+            "title": item.get("title", ""),
+            "address": item.get("addr1", ""),
+            "detailAddress": item.get("addr2", ""),
+            "category": item.get("cat3", ""),
+            "image": item.get("firstimage", ""),
+            "thumbnail": item.get("firstimage2", ""),
+            "mapX": float(item.get("mapx", 0)),
+            "mapY": float(item.get("mapy", 0)),
+            "tel": item.get("tel", ""),
+            "homepage": item.get("homepage", ""),
+            "overview": item.get("overview", ""),
+            "zipcode": item.get("zipcode", "")
+        }
+        await cache.tour_cache.set(cache_key, result, settings.TOUR_DETAIL_CACHE_TTL)
+        return result
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch detail: {str(e)}")
 
@@ -137,7 +281,8 @@ async def get_tour_detail(content_id: str):
 async def get_popular_spots(
     areaCode: Optional[str] = Query(None, description="Area code (1:서울, 6:부산, 32:강원 등)"),
     contentTypeId: str = Query("12", description="Content type: 12(관광지), 32(숙박), 39(음식점)"),
-    numOfRows: int = Query(20, description="Number of results")
+    numOfRows: int = Query(20, description="Number of results"),
+    client: httpx.AsyncClient = Depends(deps.get_http_client)
 ):
     """Get popular tourist spots"""
     
@@ -157,35 +302,42 @@ async def get_popular_spots(
     if areaCode:
         params["areaCode"] = areaCode
     
+    cache_key = cache.make_key("tour:popular", params)
+    cached = await cache.tour_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/areaBasedList1",
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-            
-            if isinstance(items, dict):
-                items = [items]
-            
-            return {
-                "total": len(items),
-                "results": [
-                    {
-                        "id": item.get("contentid"),
-                        "title": item.get("title", ""),
-                        "address": item.get("addr1", ""),
-                        "category": item.get("cat3", ""),
-                        "image": item.get("firstimage", ""),
-                        "thumbnail": item.get("firstimage2", ""),
-                        "mapX": float(item.get("mapx", 0)),
-                        "mapY": float(item.get("mapy", 0))
-                    }
-                    for item in items
-                ]
-            }
+        data = await upstream.get_json(
+            client,
+            f"{BASE_URL}/areaBasedList1",
+            flight_key=cache_key,
+            params=params,
+            timeout=settings.TOUR_API_TIMEOUT
+        )
+        
+        items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+        
+        if isinstance(items, dict):
+            items = [items]
+        
+        result = {
+            "total": len(items),
+            "results": [
+                {
+                    "id": item.get("contentid"),
+                    "title": item.get("title", ""),
+                    "address": item.get("addr1", ""),
+                    "category": item.get("cat3", ""),
+                    "image": item.get("firstimage", ""),
+                    "thumbnail": item.get("firstimage2", ""),
+                    "mapX": float(item.get("mapx", 0)),
+                    "mapY": float(item.get("mapy", 0))
+                }
+                for item in items
+            ]
+        }
+        await cache.tour_cache.set(cache_key, result, settings.TOUR_LIST_CACHE_TTL)
+        return result
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch popular spots: {str(e)}")
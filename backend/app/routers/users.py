@@ -9,7 +9,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me", response_model=schemas.UserRead)
 async def read_current_user(
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.UserRead = Depends(deps.get_current_principal),
 ):
     return current_user
 
@@ -24,4 +24,5 @@ async def update_current_user(
         setattr(current_user, attr, value)
     await db.commit()
     await db.refresh(current_user)
+    deps.invalidate_principal(current_user.id)
     return current_user
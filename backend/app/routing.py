@@ -0,0 +1,89 @@
+# backend/app/routing.py
+"""Visiting-order optimization for the places of one itinerary day
+
+Distances are great-circle (haversine) kilometres computed for all pairs in
+one vectorized pass. The route is an open path from a fixed start: a
+nearest-neighbour tour improved by best-improvement 2-opt, where each pass
+evaluates every segment reversal at once as an (n x n) delta matrix.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_cross(
+    lat1: Sequence[float], lon1: Sequence[float],
+    lat2: Sequence[float], lon2: Sequence[float],
+) -> np.ndarray:
+    """Great-circle distances in km from every point of set 1 to every point of set 2"""
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lon2, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lat: Sequence[float], lon: Sequence[float]) -> np.ndarray:
+    """Pairwise great-circle distances in km"""
+    return haversine_cross(lat, lon, lat, lon)
+
+
+def path_length(dist: np.ndarray, order: Sequence[int]) -> float:
+    order = np.asarray(order, dtype=np.intp)
+    if len(order) < 2:
+        return 0.0
+    return float(dist[order[:-1], order[1:]].sum())
+
+
+def nearest_neighbor(dist: np.ndarray, start: int = 0) -> np.ndarray:
+    n = len(dist)
+    order = np.empty(n, dtype=np.intp)
+    visited = np.zeros(n, dtype=bool)
+    current = start
+    for k in range(n):
+        order[k] = current
+        visited[current] = True
+        if k + 1 < n:
+            row = np.where(visited, np.inf, dist[current])
+            current = int(np.argmin(row))
+    return order
+
+
+def two_opt(dist: np.ndarray, order: np.ndarray, max_passes: Optional[int] = None) -> np.ndarray:
+    """Improve an open path with a fixed first stop by 2-opt segment reversals"""
+    n = len(order)
+    if n < 4:
+        return order
+    # A zero-cost dummy stop appended to the path turns the open path into a
+    # cycle, so the last edge can be broken like any other.
+    ext = np.zeros((n + 1, n + 1))
+    ext[:n, :n] = dist
+    path = np.append(order, n)
+    edges = np.arange(n)
+    valid = edges[:, None] < edges[None, :] - 1
+    max_passes = max_passes or 10 * n
+    for _ in range(max_passes):
+        a, b = path[:-1], path[1:]
+        # Removing edges k < l and reconnecting reverses path[k+1 .. l]
+        delta = (
+            ext[a[:, None], a[None, :]] + ext[b[:, None], b[None, :]]
+            - ext[a, b][:, None] - ext[a, b][None, :]
+        )
+        delta[~valid] = 0.0
+        k, l = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[k, l] > -1e-9:
+            break
+        path[k + 1:l + 1] = path[k + 1:l + 1][::-1]
+    return path[:-1]
+
+
+def optimize_route(dist: np.ndarray, start: int = 0) -> np.ndarray:
+    """Visiting order (indices into dist) for an open path beginning at start"""
+    n = len(dist)
+    if n < 3:
+        order = [start] + [i for i in range(n) if i != start] if n else []
+        return np.array(order, dtype=np.intp)
+    return two_opt(dist, nearest_neighbor(dist, start))
@@ -1,6 +1,6 @@
 # backend/app/schemas.py
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
 
@@ -42,6 +42,7 @@ class ItineraryBase(BaseModel):
     description: Optional[str] = None
     start_date: date
     end_date: date
+    destination: Optional[str] = None
     
     @field_validator("end_date")
     @classmethod
@@ -64,6 +65,11 @@ class ItineraryRead(ItineraryBase):
         from_attributes = True
 
 
+class ItineraryPage(BaseModel):
+    items: List[ItineraryRead]
+    next_cursor: Optional[str] = None
+
+
 # ItineraryItem
 class ItineraryItemBase(BaseModel):
     place_name: str
@@ -74,12 +80,20 @@ class ItineraryItemBase(BaseModel):
     memo: Optional[str] = None
     place_type: Optional[str] = None
     kakao_place_id: Optional[str] = None
+    place_name_kr: Optional[str] = None
+    address: Optional[str] = None
+    visit_time: Optional[str] = None
+    external_place_id: Optional[str] = None
 
 
 class ItineraryItemCreate(ItineraryItemBase):
     pass
 
 
+class ItineraryItemUpdate(ItineraryItemCreate):
+    id: int
+
+
 class ItineraryItemRead(ItineraryItemBase):
     id: int
     created_at: datetime
@@ -102,6 +116,10 @@ class BudgetCreate(BudgetBase):
     pass
 
 
+class BudgetUpdate(BudgetCreate):
+    id: int
+
+
 class BudgetRead(BudgetBase):
     id: int
     created_at: datetime
@@ -111,6 +129,53 @@ class BudgetRead(BudgetBase):
         from_attributes = True
 
 
+class ItineraryFullRead(ItineraryRead):
+    items: List[ItineraryItemRead] = []
+    budgets: List[BudgetRead] = []
+
+
+class BudgetTotal(BaseModel):
+    currency: str
+    total: float
+    count: int
+    converted_total: Optional[float] = None
+
+
+class BudgetCategoryTotal(BudgetTotal):
+    category: str
+
+
+class BudgetDayTotal(BudgetTotal):
+    day: date
+
+
+class BudgetSummary(BaseModel):
+    by_category: List[BudgetCategoryTotal]
+    by_day: List[BudgetDayTotal]
+    by_currency: List[BudgetTotal]
+    converted_currency: Optional[str] = None
+    converted_grand_total: Optional[float] = None
+
+
+class BudgetConversion(BaseModel):
+    budget_id: int
+    amount: float
+    currency: str
+    spent_at: datetime
+    to_currency: str
+    rate: float
+    rate_date: Optional[date] = None
+    converted_amount: float
+
+
+class RouteOptimization(BaseModel):
+    visit_date: date
+    items: List[ItineraryItemRead]  # in optimized visiting order
+    distance_km: float
+    original_distance_km: float
+    applied: bool
+
+
 # Search & Exchange
 class PlaceResult(BaseModel):
     id: str
@@ -119,7 +184,17 @@ class PlaceResult(BaseModel):
     longitude: float
     address: str
     phone: Optional[str] = None
-    kakao_place_id: str
+    kakao_place_id: Optional[str] = None
+    tour_content_id: Optional[str] = None
+    source: str = "kakao"  # "kakao" or "tour"; a merged place keeps "kakao"
+    distance: Optional[int] = None  # metres from the search point
+
+
+class FederatedSearchResponse(BaseModel):
+    results: List[PlaceResult]
+    # Per source: "ok", "timeout", "error" or "disabled"
+    sources: Dict[str, str]
+    partial: bool
 
 
 class ExchangeRateResponse(BaseModel):
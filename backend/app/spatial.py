@@ -0,0 +1,268 @@
+# backend/app/spatial.py
+"""In-process grid index of known places for radius and nearest queries
+
+Places are bucketed into lat/lon cells of SPATIAL_CELL_DEG degrees. A radius
+query only looks at the cells overlapping the circle, so it costs a few dict
+lookups plus one vectorized distance pass over the candidates.
+
+The index is filled only from public upstream results we have already
+fetched (Kakao, TourAPI); places users save to itineraries are private and
+never enter it. A circle is "warm" for a
+Kakao category once a complete upstream result (is_end) covered it; radius
+queries that fit inside a warm circle are answered locally, others fall
+through to upstream.
+"""
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import routing
+from .config import settings
+
+METERS_PER_DEG_LAT = 111320.0
+
+Cell = Tuple[int, int]
+
+
+@dataclass
+class IndexedPlace:
+    source: str  # "kakao" or "tour"
+    id: str
+    name: str
+    latitude: float
+    longitude: float
+    category: str = ""
+    category_code: str = ""
+    address: str = ""
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.source, self.id
+
+
+def cell_of(lat: float, lon: float, size: float) -> Cell:
+    return math.floor(lat / size), math.floor(lon / size)
+
+
+def cells_in_radius(lat: float, lon: float, radius_m: float, size: float) -> List[Cell]:
+    """Cells overlapping the bounding box of a circle"""
+    dlat = radius_m / METERS_PER_DEG_LAT
+    dlon = radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    lat0, lon0 = cell_of(lat - dlat, lon - dlon, size)
+    lat1, lon1 = cell_of(lat + dlat, lon + dlon, size)
+    return [(i, j) for i in range(lat0, lat1 + 1) for j in range(lon0, lon1 + 1)]
+
+
+def snap(lat: float, lon: float, cell_m: float) -> Tuple[float, float]:
+    """Centre of the ~cell_m geocell containing a point (stable across callers)"""
+    lat_step = cell_m / METERS_PER_DEG_LAT
+    snapped_lat = (math.floor(lat / lat_step) + 0.5) * lat_step
+    lon_step = cell_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(snapped_lat)), 1e-6))
+    snapped_lon = (math.floor(lon / lon_step) + 0.5) * lon_step
+    return round(snapped_lat, 6), round(snapped_lon, 6)
+
+
+def bucket_radius(radius_m: float, buckets: Sequence[int], slack_m: float = 0) -> int:
+    """Smallest bucket covering radius_m + slack_m (the largest if none does)"""
+    need = radius_m + slack_m
+    return next((b for b in sorted(buckets) if b >= need), max(buckets))
+
+
+def snap_offset() -> float:
+    """Upper bound on the distance between a point and its snapped centre"""
+    # Half a cell diagonal
+    return settings.GEOCELL_METERS * 0.71
+
+
+def quantize(lat: float, lon: float, radius_m: float) -> Tuple[float, float, int]:
+    """Snapped centre and bucketed radius whose circle covers the original one"""
+    snapped_lat, snapped_lon = snap(lat, lon, settings.GEOCELL_METERS)
+    radius = bucket_radius(radius_m, settings.GEOCELL_RADIUS_BUCKETS, snap_offset())
+    return snapped_lat, snapped_lon, radius
+
+
+def distances_from(lat: float, lon: float, lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+    """Metres from one point to many"""
+    if not len(lats):
+        return np.empty(0)
+    return routing.haversine_cross([lat], [lon], lats, lons)[0] * 1000
+
+
+class SpatialIndex:
+    def __init__(
+        self, cell_deg: float, max_places: int, warm_ttl: float, max_warm_areas: int = 4096
+    ):
+        self.cell_deg = cell_deg
+        self.max_places = max_places
+        self.warm_ttl = warm_ttl
+        self.max_warm_areas = max_warm_areas
+        # Least recently written cells are evicted first
+        self._cells: "OrderedDict[Cell, Dict[Tuple[str, str], IndexedPlace]]" = OrderedDict()
+        self._where: Dict[Tuple[str, str], Cell] = {}
+        # category code -> circles fetched completely: (lat, lon, radius_m, until)
+        self._warm: Dict[str, "deque[Tuple[float, float, float, float]]"] = {}
+        self.local_hits = 0
+        self.cold_misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def add(self, place: IndexedPlace):
+        cell = cell_of(place.latitude, place.longitude, self.cell_deg)
+        old = self._where.get(place.key)
+        if old is not None and old != cell:
+            self._cells[old].pop(place.key, None)
+        self._cells.setdefault(cell, {})[place.key] = place
+        self._cells.move_to_end(cell)
+        self._where[place.key] = cell
+        while len(self._where) > self.max_places and len(self._cells) > 1:
+            evicted, places = self._cells.popitem(last=False)
+            for key in places:
+                self._where.pop(key, None)
+            self._cool(evicted)
+            self.evictions += 1
+
+    def add_many(self, places: Iterable[IndexedPlace]):
+        for place in places:
+            self.add(place)
+
+    def nearby(
+        self,
+        lat: float,
+        lon: float,
+        radius_m: float,
+        limit: Optional[int] = None,
+        category_code: Optional[str] = None,
+    ) -> List[Tuple[IndexedPlace, float]]:
+        """Known places within radius_m, nearest first, with distances in metres"""
+        candidates = [
+            place
+            for cell in cells_in_radius(lat, lon, radius_m, self.cell_deg)
+            for place in self._cells.get(cell, {}).values()
+            if category_code is None or place.category_code == category_code
+        ]
+        if not candidates:
+            return []
+        meters = distances_from(
+            lat, lon, [p.latitude for p in candidates], [p.longitude for p in candidates]
+        )
+        order = np.argsort(meters, kind="stable")
+        hits = [(candidates[i], float(meters[i])) for i in order if meters[i] <= radius_m]
+        return hits[:limit] if limit else hits
+
+    def mark_warm(self, category_code: str, lat: float, lon: float, radius_m: float):
+        """Record that every place of the category inside this circle is known"""
+        areas = self._warm.setdefault(category_code, deque(maxlen=self.max_warm_areas))
+        # Re-marking a circle (e.g. from a cached page) refreshes it in place
+        for area in [a for a in areas if a[:3] == (lat, lon, radius_m)]:
+            areas.remove(area)
+        areas.append((lat, lon, radius_m, time.monotonic() + self.warm_ttl))
+
+    def is_warm(
+        self,
+        category_code: str,
+        lat: float,
+        lon: float,
+        radius_m: float,
+        limit: Optional[int] = None,
+    ) -> bool:
+        """True if the query's answer is fully known from unexpired warm circles.
+        
+        Either the query circle lies inside a warm circle, or (with a limit)
+        the ``limit`` nearest known places do: then no unknown place can be
+        nearer than them.
+        """
+        now = time.monotonic()
+        areas = [a for a in self._warm.get(category_code, ()) if a[3] > now]
+        warm = False
+        if areas:
+            meters = routing.haversine_cross(
+                [lat], [lon], [a[0] for a in areas], [a[1] for a in areas]
+            )[0] * 1000
+            covered = float((np.array([a[2] for a in areas]) - meters).max())
+            warm = covered >= radius_m or (
+                limit is not None
+                and covered > 0
+                and len(self.nearby(lat, lon, covered, limit, category_code)) >= limit
+            )
+        if warm:
+            self.local_hits += 1
+        else:
+            self.cold_misses += 1
+        return warm
+
+    def _cool(self, cell: Cell):
+        """Forget warm circles that overlap an evicted cell"""
+        size = self.cell_deg
+        lat, lon = (cell[0] + 0.5) * size, (cell[1] + 0.5) * size
+        half_diag = size * METERS_PER_DEG_LAT * 0.75
+        for code, areas in self._warm.items():
+            if not areas:
+                continue
+            meters = routing.haversine_cross(
+                [lat], [lon], [a[0] for a in areas], [a[1] for a in areas]
+            )[0] * 1000
+            keep = [a for a, m in zip(areas, meters) if m > a[2] + half_diag]
+            self._warm[code] = deque(keep, maxlen=self.max_warm_areas)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "places": len(self._where),
+            "cells": len(self._cells),
+            "warm_areas": sum(len(areas) for areas in self._warm.values()),
+            "max_places": self.max_places,
+            "local_hits": self.local_hits,
+            "cold_misses": self.cold_misses,
+            "evictions": self.evictions,
+        }
+
+
+place_index = SpatialIndex(
+    settings.SPATIAL_CELL_DEG,
+    settings.SPATIAL_INDEX_MAX_PLACES,
+    settings.SPATIAL_WARM_TTL,
+)
+
+
+def place_dict(place: IndexedPlace, distance_m: float) -> Dict[str, Any]:
+    return {**asdict(place), "distance": int(round(distance_m))}
+
+
+def index_kakao_documents(documents: Iterable[Dict[str, Any]]):
+    """Index raw Kakao Local place documents (keyword or category search)"""
+    place_index.add_many(
+        IndexedPlace(
+            source="kakao",
+            id=doc["id"],
+            name=doc["place_name"],
+            latitude=float(doc["y"]),
+            longitude=float(doc["x"]),
+            category=doc.get("category_name", ""),
+            category_code=doc.get("category_group_code", ""),
+            address=doc.get("address_name", ""),
+        )
+        for doc in documents
+        if doc.get("x") and doc.get("y")
+    )
+
+
+def index_tour_items(items: Iterable[Dict[str, Any]]):
+    """Index raw TourAPI list items"""
+    place_index.add_many(
+        IndexedPlace(
+            source="tour",
+            id=str(item["contentid"]),
+            name=item.get("title", ""),
+            latitude=float(item["mapy"]),
+            longitude=float(item["mapx"]),
+            category=item.get("cat3", ""),
+            address=item.get("addr1", ""),
+        )
+        for item in items
+        if item.get("contentid") and item.get("mapx") and item.get("mapy")
+    )
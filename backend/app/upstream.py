@@ -0,0 +1,66 @@
+# backend/app/upstream.py
+"""Application-scoped HTTP client for third-party APIs"""
+from typing import Any, Optional
+
+import httpx
+
+from .config import settings
+from .singleflight import upstream_flight
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    # httpx keeps a separate keep-alive pool per origin, so a single client
+    # serves dapi.kakao.com, apis.data.go.kr and exchangerate-api alike.
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+async def init_client():
+    """Create the shared client (called from the app lifespan)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+
+
+async def close_client():
+    """Close the shared client and release pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside the lifespan"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def get_json(
+    client: httpx.AsyncClient,
+    url: str,
+    flight_key: Optional[str] = None,
+    **kwargs: Any,
+) -> Any:
+    """GET a JSON document, coalescing identical in-flight calls by flight_key"""
+    async def fetch():
+        response = await client.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    if flight_key is None:
+        return await fetch()
+    return await upstream_flight.do(flight_key, fetch)
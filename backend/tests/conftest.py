@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+
+# app.db builds its engine at import time; keep tests off the real database
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
@@ -0,0 +1,46 @@
+# backend/tests/test_federated_search.py
+import pytest
+
+from app import upstream
+from app.routers import kakao, search, tour
+
+SEOUL = (37.5796, 126.9770)
+
+
+def _item(content_id, title, lat, lon):
+    return {"contentid": content_id, "title": title, "mapy": str(lat), "mapx": str(lon)}
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    calls = []
+
+    async def get_json(client, url, flight_key=None, **kwargs):
+        calls.append(url)
+        if "kakao" in url:
+            return {"meta": {"is_end": True, "total_count": 0}, "documents": []}
+        if url.endswith("/searchKeyword1"):
+            return {"response": {"body": {"items": {"item": [
+                _item("1", "경복궁", 37.5788, 126.9770),
+                _item("2", "경복궁 (부산)", 35.1796, 129.0756),
+            ]}}}}
+        # A location list is not filtered by keyword
+        return {"response": {"body": {"items": {"item": [
+            _item("9", "Unrelated Museum", 37.5790, 126.9772),
+        ]}}}}
+
+    monkeypatch.setattr(upstream, "get_json", get_json)
+    monkeypatch.setattr(kakao, "KAKAO_REST_API_KEY", "test")
+    monkeypatch.setattr(tour, "TOUR_API_KEY", "test")
+    return calls
+
+
+async def test_tour_results_match_the_query_and_the_circle(fake_upstream):
+    response = await search.federated_search(
+        q="경복궁", latitude=SEOUL[0], longitude=SEOUL[1], radius=5000, limit=15, client=None
+    )
+
+    assert [place.id for place in response.results] == ["tour:1"]
+    assert response.results[0].distance < 200
+    assert response.sources == {"kakao": "ok", "tour": "ok"}
+    assert not any(url.endswith("/locationBasedList1") for url in fake_upstream)
@@ -0,0 +1,29 @@
+# backend/tests/test_ordering.py
+"""Gapped ordering keys"""
+from app import ordering
+
+
+def test_key_between_splits_the_gap():
+    assert ordering.key_between(1024, 2048) == 1536
+    assert 1024 < ordering.key_between(1024, 1026) < 1026
+
+
+def test_key_between_open_ends():
+    assert ordering.key_between(None, None) == ordering.GAP
+    assert ordering.key_between(2048, None) == 2048 + ordering.GAP
+    assert 0 < ordering.key_between(None, 1024) < 1024
+
+
+def test_key_between_exhausted_gap():
+    assert ordering.key_between(1024, 1025) is None
+    assert ordering.key_between(None, 1) is None
+
+
+def test_key_after_and_spaced_keys():
+    assert ordering.key_after(None) == ordering.GAP
+    assert ordering.key_after(3000) == 3000 + ordering.GAP
+    assert ordering.spaced_keys(0) == []
+    keys = ordering.spaced_keys(4)
+    assert keys == sorted(keys)
+    assert all(b - a == ordering.GAP for a, b in zip(keys, keys[1:]))
+    assert keys[0] == ordering.GAP
@@ -0,0 +1,37 @@
+# backend/tests/test_pagination.py
+"""Keyset cursors round-trip and reject anything else with 400"""
+import base64
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app import pagination
+
+
+def test_cursor_round_trip():
+    cursor = pagination.encode_cursor(date(2025, 3, 1), 42)
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor) == (date(2025, 3, 1), 42)
+
+
+def _b64(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    _b64("not json"),
+    _b64("5"),
+    _b64('["2025-03-01"]'),
+    _b64('["2025-03-01", 1, 2]'),
+    _b64('["2025-13-01", 1]'),
+    _b64('["2025-03-01", "x"]'),
+    _b64('["2025-03-01", null]'),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_invalid_cursors_are_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        pagination.decode_cursor(cursor)
+    assert exc.value.status_code == 400
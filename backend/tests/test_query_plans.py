@@ -0,0 +1,85 @@
+# backend/tests/test_query_plans.py
+"""The hot list reads must be served by their composite indexes"""
+from datetime import date
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import crud
+from app.db import Base
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def _plans(engine, read):
+    """EXPLAIN QUERY PLAN of every SELECT ``read`` issues"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(engine) as session:
+            await read(session)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    assert statements
+
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append(" | ".join(row[3] for row in rows))
+    return plans
+
+
+def _assert_uses(plan: str, table: str, index: str):
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+    assert f"SCAN {table}" not in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+async def test_itinerary_page_uses_user_start_date_index(engine):
+    plans = await _plans(engine, lambda db: crud.get_itineraries(db, user_id=1, limit=10))
+    _assert_uses(plans[0], "itineraries", "ix_itineraries_user_start_date")
+
+
+async def test_itinerary_keyset_page_uses_user_start_date_index(engine):
+    plans = await _plans(
+        engine,
+        lambda db: crud.get_itineraries(db, user_id=1, limit=10, after=(date(2025, 3, 1), 42)),
+    )
+    _assert_uses(plans[0], "itineraries", "ix_itineraries_user_start_date")
+
+
+async def test_items_use_itinerary_visit_index(engine):
+    plans = await _plans(engine, lambda db: crud.get_owned_items(db, itinerary_id=1, user_id=1))
+    _assert_uses(plans[0], "itinerary_items", "ix_itinerary_items_itinerary_visit")
+
+
+async def test_budgets_use_itinerary_spent_at_index(engine):
+    plans = await _plans(engine, lambda db: crud.get_owned_budgets(db, itinerary_id=1, user_id=1))
+    _assert_uses(plans[0], "budgets", "ix_budgets_itinerary_spent_at")
+
+
+async def test_full_itinerary_loads_use_child_indexes(engine):
+    async with engine.begin() as conn:
+        await conn.execute(text("INSERT INTO users (id, social_provider, social_id) VALUES (1, 'google', 'g1')"))
+        await conn.execute(text(
+            "INSERT INTO itineraries (id, user_id, title, start_date, end_date) "
+            "VALUES (1, 1, 't', '2025-03-01', '2025-03-05')"
+        ))
+    plans = await _plans(engine, lambda db: crud.get_itinerary_full(db, itinerary_id=1, user_id=1))
+    children = {plan.split()[1]: plan for plan in plans[1:]}
+    _assert_uses(children["itinerary_items"], "itinerary_items", "ix_itinerary_items_itinerary_visit")
+    _assert_uses(children["budgets"], "budgets", "ix_budgets_itinerary_spent_at")
@@ -0,0 +1,27 @@
+# backend/tests/test_rates.py
+"""Local cross rates from one anchor table"""
+import numpy as np
+import pytest
+
+from app import rates
+
+TABLE = rates.RateTable("USD", {"USD": 1.0, "KRW": 1350.0, "JPY": 150.0, "EUR": 0.9, "XXX": 0.0}, "", 0, 0.0)
+
+
+def test_rates_many_matches_scalar_rates():
+    matrix = rates.RateMatrix(TABLE)
+    sources = ["krw", "USD", "JPY", "EUR", "KRW"]
+    targets = ["USD", "KRW", "KRW", "JPY", "KRW"]
+    expected = [matrix.rate(a, b) for a, b in zip(sources, targets)]
+    assert np.allclose(matrix.rates_many(sources, targets), expected)
+    assert matrix.rates_many(["JPY"], ["KRW"])[0] == pytest.approx(9.0)
+
+
+def test_rates_many_empty():
+    assert rates.RateMatrix(TABLE).rates_many([], []).shape == (0,)
+
+
+@pytest.mark.parametrize("sources, targets", [(["USD", "ABC"], ["KRW", "KRW"]), (["USD"], ["XXX"])])
+def test_rates_many_unknown_or_zero_rate_currency(sources, targets):
+    with pytest.raises(rates.UnsupportedCurrencyError):
+        rates.RateMatrix(TABLE).rates_many(sources, targets)
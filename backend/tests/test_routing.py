@@ -0,0 +1,78 @@
+# backend/tests/test_routing.py
+"""Visiting-order optimizer: valid open paths, never worse than the input"""
+import time
+
+import numpy as np
+import pytest
+
+from app import routing
+
+
+def _day(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = 37.55 + rng.uniform(-0.05, 0.05, n)
+    lon = 126.98 + rng.uniform(-0.06, 0.06, n)
+    return routing.haversine_matrix(lat, lon)
+
+
+def _assert_route(order, n, start):
+    assert sorted(order.tolist()) == list(range(n))
+    assert order[0] == start
+
+
+def test_haversine_matrix_is_symmetric_with_zero_diagonal():
+    dist = _day(5)
+    assert np.allclose(dist, dist.T)
+    assert np.allclose(np.diag(dist), 0.0)
+    # Seoul City Hall to Gangnam station is roughly 8.9 km
+    assert routing.haversine_cross([37.5663], [126.9779], [37.4979], [127.0276])[0, 0] == pytest.approx(8.9, abs=0.2)
+
+
+def test_nearest_neighbor_always_moves_to_the_closest_unvisited_stop():
+    # Stops on a line: 0 at km 0, 1 at km 10, 2 at km 1, 3 at km 3
+    points = np.array([0.0, 10.0, 1.0, 3.0])
+    dist = np.abs(points[:, None] - points[None, :])
+    assert routing.nearest_neighbor(dist).tolist() == [0, 2, 3, 1]
+    assert routing.nearest_neighbor(dist, start=1).tolist() == [1, 3, 2, 0]
+
+
+def test_two_opt_can_reverse_the_tail_of_an_open_path():
+    # Only breaking the final edge (via the dummy stop) fixes 0 -> 3 -> 2 -> 1
+    points = np.array([0.0, 1.0, 2.0, 3.0])
+    dist = np.abs(points[:, None] - points[None, :])
+    order = routing.two_opt(dist, np.array([0, 3, 2, 1]))
+    assert order.tolist() == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("n", [0, 1, 2])
+def test_optimize_route_short_days(n):
+    dist = _day(n) if n else np.zeros((0, 0))
+    start = n - 1 if n else 0
+    order = routing.optimize_route(dist, start=start)
+    if n:
+        _assert_route(order, n, start)
+    else:
+        assert order.tolist() == []
+
+
+@pytest.mark.parametrize("n, start", [(3, 0), (8, 5), (40, 17), (120, 0)])
+def test_optimize_route_is_a_permutation_no_longer_than_the_input(n, start):
+    dist = _day(n, seed=n)
+    order = routing.optimize_route(dist, start=start)
+    _assert_route(order, n, start)
+    given = [start] + [i for i in range(n) if i != start]
+    assert routing.path_length(dist, order) <= routing.path_length(dist, given) + 1e-9
+    assert routing.path_length(dist, order) <= routing.path_length(
+        dist, routing.nearest_neighbor(dist, start)
+    ) + 1e-9
+
+
+def test_optimize_route_200_stops_under_50ms():
+    dist = _day(200, seed=1)
+    routing.optimize_route(dist)  # warm up numpy
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        routing.optimize_route(dist)
+        timings.append(time.perf_counter() - started)
+    assert min(timings) < 0.05
@@ -0,0 +1,73 @@
+# backend/tests/test_singleflight.py
+"""Concurrent identical calls share one in-flight task"""
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    started = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal started
+        started += 1
+        await release.wait()
+        return {"ok": True}
+
+    waiters = [asyncio.ensure_future(flight.do("k", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+    assert started == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"in_flight": 0, "calls": 1, "coalesced": 4}
+
+
+async def test_distinct_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+
+    async def value(v):
+        return v
+
+    assert await asyncio.gather(flight.do("a", lambda: value(1)), flight.do("b", lambda: value(2))) == [1, 2]
+    assert await flight.do("a", lambda: value(3)) == 3
+    assert flight.stats()["calls"] == 3
+
+
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+    async def ok():
+        return 1
+
+    assert await flight.do("k", ok) == 1
+
+
+async def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return 7
+
+    first = asyncio.ensure_future(flight.do("k", fetch))
+    second = asyncio.ensure_future(flight.do("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == 7
+    with pytest.raises(asyncio.CancelledError):
+        await first